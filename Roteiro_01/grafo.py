@@ -9,24 +9,34 @@ class Grafo:
     QTDE_MAX_SEPARADOR = 1
     SEPARADOR_ARESTA = '-'
 
-    def __init__(self, N=[], A={}):
+    def __init__(self, N=None, A=None):
         '''
         Constrói um objeto do tipo Grafo. Se nenhum parâmetro for passado, cria um Grafo vazio.
         Se houver alguma aresta ou algum vértice inválido, uma exceção é lançada.
         :param N: Uma lista dos vértices (ou nodos) do grafo.
         :param V: Uma dicionário que guarda as arestas do grafo. A chave representa o nome da aresta e o valor é uma string que contém dois vértices separados por um traço.
         '''
+        if N == None:
+            N = list()
+        if A == None:
+            A = dict()
+
         for v in N:
             if not(Grafo.verticeValido(v)):
                 raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
         self.N = N
+        self.__vertices = set(N)
 
         for a in A:
             if not(self.arestaValida(A[a])):
                 raise ArestaInvalidaException('A aresta ' + A[a] + ' é inválida')
 
         self.A = A
+        self.__arestas_por_extremos = dict()
+        self.__incidencia = {v: [] for v in self.N}
+        for nome in A:
+            self.__indexa_aresta(nome, A[nome])
 
     def arestaValida(self, aresta=''):
         '''
@@ -73,7 +83,45 @@ class Grafo:
         :param vertice: O vértice que deve ser verificado.
         :return: Um valor booleano que indica se o vértice existe no grafo.
         '''
-        return Grafo.verticeValido(vertice) and self.N.count(vertice) > 0
+        return Grafo.verticeValido(vertice) and vertice in self.__vertices
+
+    def __extremos_aresta(self, a):
+        '''
+        Dada uma aresta no formato X-Y, retorna a tupla (X, Y)
+        :param a: A aresta a ser analisada
+        :return: Uma tupla com os dois vértices da aresta
+        '''
+        v1, _, v2 = a.partition(Grafo.SEPARADOR_ARESTA)
+        return v1, v2
+
+    def __indexa_aresta(self, nome, a):
+        '''
+        Registra a aresta no índice que associa o par de vértices aos nomes das arestas que os ligam
+        e na lista de arestas incidentes sobre cada um dos seus vértices.
+        :param nome: O nome da aresta
+        :param a: A aresta no formato X-Y
+        '''
+        v1, v2 = self.__extremos_aresta(a)
+        self.__arestas_por_extremos.setdefault((v1, v2), []).append(nome)
+        self.__incidencia[v1].append(nome)
+        if v1 != v2:
+            self.__incidencia[v2].append(nome)
+
+    def __desindexa_aresta(self, nome, a):
+        '''
+        Retira a aresta do índice que associa o par de vértices aos nomes das arestas que os ligam
+        e da lista de arestas incidentes sobre cada um dos seus vértices.
+        :param nome: O nome da aresta
+        :param a: A aresta no formato X-Y
+        '''
+        v1, v2 = self.__extremos_aresta(a)
+        nomes = self.__arestas_por_extremos[(v1, v2)]
+        nomes.remove(nome)
+        if not nomes:
+            del self.__arestas_por_extremos[(v1, v2)]
+        self.__incidencia[v1].remove(nome)
+        if v1 != v2:
+            self.__incidencia[v2].remove(nome)
 
     def existeAresta(self, aresta=''):
         '''
@@ -81,13 +129,7 @@ class Grafo:
         :param aresta: A aresta a ser verificada
         :return: Um valor booleano que indica se a aresta existe no grafo.
         '''
-        existe = False
-        if Grafo.arestaValida(self, aresta):
-            for k in self.A:
-                if aresta == self.A[k]:
-                    existe = True
-
-        return existe
+        return Grafo.arestaValida(self, aresta) and self.__extremos_aresta(aresta) in self.__arestas_por_extremos
 
     def adicionaVertice(self, v):
         '''
@@ -97,6 +139,8 @@ class Grafo:
         '''
         if self.verticeValido(v) and not self.existeVertice(v):
             self.N.append(v)
+            self.__vertices.add(v)
+            self.__incidencia[v] = []
         else:
             raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
@@ -107,21 +151,22 @@ class Grafo:
         :raises: ArestaInvalidaException se a aresta passada como parâmetro não puder ser adicionada
         '''
         if self.arestaValida(a):
+            if nome in self.A:
+                self.__desindexa_aresta(nome, self.A[nome])
             self.A[nome] = a
+            self.__indexa_aresta(nome, a)
         else:
-            ArestaInvalidaException('A aresta ' + self.A[a] + ' é inválida')
+            raise ArestaInvalidaException('A aresta ' + a + ' é inválida')
 
 
     def vertices_nao_adjacentes(self):
-      lista_arestas = self.A.values()
+      extremos = self.__arestas_por_extremos
 
       resultado=[]
       for i in self.N:
         for j in self.N:
-          aresta_indo = '{}-{}'.format(i, j)
-          aresta_vindo = '{}-{}'.format(j, i)
-          if (aresta_indo not in lista_arestas) and (aresta_vindo not in lista_arestas):
-            resultado.append(aresta_indo)
+          if ((i, j) not in extremos) and ((j, i) not in extremos):
+            resultado.append('{}-{}'.format(i, j))
 
       return resultado
 
@@ -136,47 +181,16 @@ class Grafo:
 
 
     def ha_paralelas(self):
-        lista_aresta=[]
-        for i in self.A.values():
-            lista_aresta.append(i)
-
-
-        guarda_indice =0
-        ares = ""
-        tam=len(lista_aresta)
-        for i in range(len(lista_aresta)):
-            guarda_indice=i
-            ares= lista_aresta[i]
-            for k in range(len(lista_aresta)):
-                if ares==lista_aresta[k] and guarda_indice!=k:
-                    return True
+        for nomes in self.__arestas_por_extremos.values():
+            if len(nomes) > 1:
+                return True
         return False
 
     def grau(self, ve):
-        c=0
-        for i in self.A.values():
-            n1,n2 = i.split(self.SEPARADOR_ARESTA)
-
-            if n1==ve or n2==ve:
-                c=c+1
-        return c
+        return len(self.__incidencia.get(ve, ())) # Um vértice que não está no grafo tem grau 0
 
     def arestas_sobre_vertice(self, v):
-        lista_arestas = self.A.values()
-        lista = []
-        for i in self.N:
-            a1 = "{}-{}".format(i, v)
-            a2 = "{}-{}".format(v, i)
-            if a1 in lista_arestas:
-                for z in self.A:
-                    if a1 in self.A[z]:
-                        lista.append(z)
-            elif a2 in lista_arestas:
-                for z in self.A:
-                    if a2 in self.A[z]:
-                        lista.append(z)
-
-        return lista
+        return list(self.__incidencia.get(v, ())) # Nenhuma aresta incide sobre um vértice que não está no grafo
 
     def eh_completo(self):
         n=0
@@ -24,16 +24,22 @@ class Grafo:
             self.N = N
         else:
             self.N = list()
+        self.__vertices = set(self.N)
 
 
         if A != None:
             for a in A:
                 if not(self.arestaValida(A[a])):
                     raise ArestaInvalidaException('A aresta ' + A[a] + ' é inválida')
-            self.A = dict()
+            self.A = A
         else:
             self.A = dict()
 
+        self.__arestas_por_extremos = dict()
+        self.__incidencia = {v: [] for v in self.N}
+        for nome in self.A:
+            self.__indexa_aresta(nome, self.A[nome])
+
     def arestaValida(self, aresta=''):
         '''
         Verifica se uma aresta passada como parâmetro está dentro do padrão estabelecido.
@@ -79,7 +85,45 @@ class Grafo:
         :param vertice: O vértice que deve ser verificado.
         :return: Um valor booleano que indica se o vértice existe no grafo.
         '''
-        return Grafo.verticeValido(vertice) and self.N.count(vertice) > 0
+        return Grafo.verticeValido(vertice) and vertice in self.__vertices
+
+    def __extremos_aresta(self, a):
+        '''
+        Dada uma aresta no formato X-Y, retorna a tupla (X, Y)
+        :param a: A aresta a ser analisada
+        :return: Uma tupla com os dois vértices da aresta
+        '''
+        v1, _, v2 = a.partition(Grafo.SEPARADOR_ARESTA)
+        return v1, v2
+
+    def __indexa_aresta(self, nome, a):
+        '''
+        Registra a aresta no índice que associa o par de vértices aos nomes das arestas que os ligam
+        e na lista de arestas incidentes sobre cada um dos seus vértices.
+        :param nome: O nome da aresta
+        :param a: A aresta no formato X-Y
+        '''
+        v1, v2 = self.__extremos_aresta(a)
+        self.__arestas_por_extremos.setdefault((v1, v2), []).append(nome)
+        self.__incidencia[v1].append(nome)
+        if v1 != v2:
+            self.__incidencia[v2].append(nome)
+
+    def __desindexa_aresta(self, nome, a):
+        '''
+        Retira a aresta do índice que associa o par de vértices aos nomes das arestas que os ligam
+        e da lista de arestas incidentes sobre cada um dos seus vértices.
+        :param nome: O nome da aresta
+        :param a: A aresta no formato X-Y
+        '''
+        v1, v2 = self.__extremos_aresta(a)
+        nomes = self.__arestas_por_extremos[(v1, v2)]
+        nomes.remove(nome)
+        if not nomes:
+            del self.__arestas_por_extremos[(v1, v2)]
+        self.__incidencia[v1].remove(nome)
+        if v1 != v2:
+            self.__incidencia[v2].remove(nome)
 
     def existeAresta(self, aresta=''):
         '''
@@ -87,13 +131,7 @@ class Grafo:
         :param aresta: A aresta a ser verificada
         :return: Um valor booleano que indica se a aresta existe no grafo.
         '''
-        existe = False
-        if Grafo.arestaValida(self, aresta):
-            for k in self.A:
-                if aresta == self.A[k]:
-                    existe = True
-
-        return existe
+        return Grafo.arestaValida(self, aresta) and self.__extremos_aresta(aresta) in self.__arestas_por_extremos
 
     def adicionaVertice(self, v):
         '''
@@ -103,6 +141,8 @@ class Grafo:
         '''
         if self.verticeValido(v) and not self.existeVertice(v):
             self.N.append(v)
+            self.__vertices.add(v)
+            self.__incidencia[v] = []
         else:
             raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
@@ -113,19 +153,20 @@ class Grafo:
         :raises: ArestaInvalidaException se a aresta passada como parâmetro não puder ser adicionada
         '''
         if self.arestaValida(a):
+            if nome in self.A:
+                self.__desindexa_aresta(nome, self.A[nome])
             self.A[nome] = a
+            self.__indexa_aresta(nome, a)
         else:
-            ArestaInvalidaException('A aresta ' + self.A[a] + ' é inválida')
+            raise ArestaInvalidaException('A aresta ' + a + ' é inválida')
     def vertices_nao_adjacentes(self):
-      lista_arestas = self.A.values()
+      extremos = self.__arestas_por_extremos
 
       resultado=[]
       for i in self.N:
         for j in self.N:
-          aresta_indo = '{}-{}'.format(i, j)
-          aresta_vindo = '{}-{}'.format(j, i)
-          if (aresta_indo not in lista_arestas) and (aresta_vindo not in lista_arestas):
-            resultado.append(aresta_indo)
+          if ((i, j) not in extremos) and ((j, i) not in extremos):
+            resultado.append('{}-{}'.format(i, j))
 
       return resultado
 
@@ -140,47 +181,16 @@ class Grafo:
 
 
     def ha_paralelas(self):
-        lista_aresta=[]
-        for i in self.A.values():
-            lista_aresta.append(i)
-
-
-        guarda_indice =0
-        ares = ""
-        tam=len(lista_aresta)
-        for i in range(len(lista_aresta)):
-            guarda_indice=i
-            ares= lista_aresta[i]
-            for k in range(len(lista_aresta)):
-                if ares==lista_aresta[k] and guarda_indice!=k:
-                    return True
+        for nomes in self.__arestas_por_extremos.values():
+            if len(nomes) > 1:
+                return True
         return False
 
     def grau(self, ve):
-        c=0
-        for i in self.A.values():
-            n1,n2 = i.split(self.SEPARADOR_ARESTA)
-
-            if n1==ve or n2==ve:
-                c=c+1
-        return c
+        return len(self.__incidencia.get(ve, ())) # Um vértice que não está no grafo tem grau 0
 
     def arestas_sobre_vertice(self, v):
-        lista_arestas = self.A.values()
-        lista = []
-        for i in self.N:
-            a1 = "{}-{}".format(i, v)
-            a2 = "{}-{}".format(v, i)
-            if a1 in lista_arestas:
-                for z in self.A:
-                    if a1 in self.A[z]:
-                        lista.append(z)
-            elif a2 in lista_arestas:
-                for z in self.A:
-                    if a2 in self.A[z]:
-                        lista.append(z)
-
-        return lista
+        return list(self.__incidencia.get(v, ())) # Nenhuma aresta incide sobre um vértice que não está no grafo
 
     def eh_completo(self):
         n=0
@@ -205,29 +215,45 @@ class Grafo:
         else:
             return False
 
-    def DFS(self,v):
-        lista = []
-        if self.verticeValido(v):
-            self.DFS_recursiva(v,lista)
-            return lista
-
-    def DFS_recursiva(self,v,lista=[]):
-        lista_aresta=self.A
-        lista_v=self.arestas_sobre_vertice(v)
-
-
-        lista.append(v)
-
-        for i in lista_aresta:
-            for i in lista_v:
-                if lista_aresta[i][0] not in lista or lista_aresta[i][2] not in lista:
-                    v1,v2= lista_aresta[i].split(self.SEPARADOR_ARESTA)
-                    if v1!=v:
-                        lista.append(i)
-                        self.DFS_recursiva(v1,lista)
-                    if v2!=v:
-                        lista.append(i)
-                        self.DFS_recursiva(v2,lista)
+    def DFS(self, v):
+        '''
+        Faz uma busca em profundidade a partir de v.
+        :param v: O vértice de partida
+        :return: Uma lista alternando vértices e arestas, como produzida por busca_em_profundidade
+        :raises: VerticeInvalidoException se o vértice não existir no grafo
+        '''
+        return list(self.busca_em_profundidade(v))
+
+    def busca_em_profundidade(self, v):
+        '''
+        Busca em profundidade a partir de v, com pilha explícita, sem recursão. Os elementos são produzidos à medida que a
+        busca avança: primeiro v e depois, para cada vértice descoberto, o nome da aresta da árvore pela qual ele foi
+        alcançado e o próprio vértice. As arestas de cada vértice são percorridas na ordem de arestas_sobre_vertice.
+        O grafo não deve ser alterado enquanto a busca estiver em andamento.
+        :param v: O vértice de partida
+        :return: Um gerador que alterna vértices e arestas
+        :raises: VerticeInvalidoException se o vértice não existir no grafo
+        '''
+        if not self.existeVertice(v):
+            raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
+
+        visitados = {v}
+        yield v
+        pilha = [(v, iter(self.__incidencia[v]))] # Cada vértice em visita e as arestas dele que ainda não foram vistas
+        while pilha:
+            u, arestas = pilha[-1]
+            for nome in arestas:
+                v1, v2 = self.__extremos_aresta(self.A[nome])
+                w = v2 if v1 == u else v1
+                if w not in visitados:
+                    visitados.add(w)
+                    yield nome
+                    yield w
+                    pilha.append((w, iter(self.__incidencia[w])))
+                    break
+            else:
+                pilha.pop()
+
 
 
 
@@ -1,4 +1,11 @@
 # -*- coding: utf-8 -*-
+from array import array
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class VerticeInvalidoException(Exception):
     pass
@@ -9,18 +16,343 @@ class ArestaInvalidaException(Exception):
 class MatrizInvalidaException(Exception):
     pass
 
+class GrafoCongeladoException(Exception):
+    pass
+
+
+class Armazenamento:
+    '''
+    Forma de guardar as arestas de um grafo não direcionado. Os vértices são identificados pelos seus índices (de 0 a V-1)
+    e cada par de vértices guarda a quantidade de arestas que os ligam.
+    As subclasses precisam implementar __len__, adiciona_vertice, multiplicidade, altera_multiplicidade e vizinhos;
+    as demais consultas têm uma implementação genérica baseada em vizinhos, que pode ser substituída por uma mais rápida.
+    '''
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def adiciona_vertice(self):
+        '''
+        Acrescenta um vértice isolado, cujo índice é o número de vértices anterior.
+        '''
+        raise NotImplementedError
+
+    def multiplicidade(self, i: int, j: int):
+        '''
+        :return: A quantidade de arestas que ligam os vértices i e j, em qualquer ordem
+        '''
+        raise NotImplementedError
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        '''
+        Soma delta à quantidade de arestas que ligam os vértices i e j.
+        '''
+        raise NotImplementedError
+
+    def vizinhos(self, i: int):
+        '''
+        :return: Uma lista de tuplas (j, quantidade de arestas entre i e j), ordenada por j, só com os vértices adjacentes a i
+        '''
+        raise NotImplementedError
+
+    def grau(self, i: int):
+        '''
+        :return: A quantidade de arestas incidentes sobre o vértice i (um laço conta uma vez)
+        '''
+        return sum(q for _, q in self.vizinhos(i))
+
+    def linha_bits(self, i: int):
+        '''
+        :return: A vizinhança do vértice i como um conjunto de bits guardado num inteiro: o bit j vale 1 se i e j são adjacentes
+        '''
+        bits = 0
+        for j, _ in self.vizinhos(i):
+            bits |= 1 << j
+        return bits
+
+    @staticmethod
+    def indices_dos_bits(bits: int):
+        '''
+        Percorre, do menor para o maior, os índices dos bits que valem 1 num conjunto de bits
+        '''
+        while bits:
+            menor = bits & -bits
+            yield menor.bit_length() - 1
+            bits ^= menor
+
+    def completo(self):
+        '''
+        :return: Um valor booleano que indica se todo par de vértices distintos é ligado por ao menos uma aresta
+        '''
+        n = len(self)
+        todos = (1 << n) - 1
+        for i in range(n):
+            if self.linha_bits(i) | (1 << i) != todos:
+                return False
+        return True
+
+    def pares_nao_adjacentes(self):
+        '''
+        :return: Uma lista de tuplas (i, j), com i <= j, dos pares de vértices sem arestas entre si, na ordem das linhas da matriz
+        '''
+        pares = []
+        n = len(self)
+        todos = (1 << n) - 1
+        for i in range(n):
+            # Os bits j >= i que não estão na vizinhança de i
+            livres = ~self.linha_bits(i) & todos & ~((1 << i) - 1)
+            pares.extend((i, j) for j in self.indices_dos_bits(livres))
+        return pares
+
+    def quantidade_de_pares(self, multiplicidade: int):
+        '''
+        :return: A quantidade de pares de vértices (incluindo laços) ligados por exatamente "multiplicidade" arestas, com multiplicidade > 0
+        '''
+        quantidade = 0
+        for i in range(len(self)):
+            for j, q in self.vizinhos(i):
+                if i <= j and q == multiplicidade:
+                    quantidade += 1
+        return quantidade
+
+    def matriz(self):
+        '''
+        Monta a matriz de adjacência no formato usado pelo Grafo: a quantidade de arestas acima da diagonal principal
+        (incluindo a diagonal) e um traço "-" abaixo dela.
+        '''
+        n = len(self)
+        M = [['-'] * k + [0] * (n - k) for k in range(n)]
+        for i in range(n):
+            for j, q in self.vizinhos(i):
+                if i <= j:
+                    M[i][j] = q
+        return M
+
+
+class ArmazenamentoMatriz(Armazenamento):
+    '''
+    Matriz de adjacência densa, guardando só a diagonal principal e os elementos acima dela (os que ficam abaixo seriam
+    sempre um traço "-"). As V(V+1)/2 células ficam num único array('H'), coluna a coluna: o elemento (i, j), com i <= j,
+    fica na posição j(j+1)/2 + i. Assim, adicionar um vértice só acrescenta a sua coluna no fim do array, em O(V).
+    '''
+
+    def __init__(self, n=0):
+        self.__n = n
+        self.__celulas = array('H', [0]) * (n * (n + 1) // 2)
+        self.__bits = [0] * n # A vizinhança de cada vértice como conjunto de bits (ver linha_bits)
+
+    def __posicao(self, i: int, j: int):
+        if i > j:
+            i, j = j, i
+        return j * (j + 1) // 2 + i
+
+    def __len__(self):
+        return self.__n
+
+    def adiciona_vertice(self):
+        self.__celulas.extend(array('H', [0]) * (self.__n + 1)) # adiciona a coluna do vértice
+        self.__bits.append(0)
+        self.__n += 1
+
+    def multiplicidade(self, i: int, j: int):
+        return self.__celulas[self.__posicao(i, j)]
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        posicao = self.__posicao(i, j)
+        self.__celulas[posicao] += delta
+        if self.__celulas[posicao]:
+            self.__bits[i] |= 1 << j
+            self.__bits[j] |= 1 << i
+        else:
+            self.__bits[i] &= ~(1 << j)
+            self.__bits[j] &= ~(1 << i)
+
+    def linha_bits(self, i: int):
+        return self.__bits[i]
+
+    def vizinhos(self, i: int):
+        celulas = self.__celulas
+        # Percorre só os bits da linha i, em vez de varrer a coluna inteira
+        lista = []
+        for j in Armazenamento.indices_dos_bits(self.__bits[i]):
+            if j <= i:
+                lista.append((j, celulas[i * (i + 1) // 2 + j]))
+            else:
+                lista.append((j, celulas[j * (j + 1) // 2 + i]))
+        return lista
+
+    def matriz(self):
+        celulas = self.__celulas
+        M = [['-'] * k + [0] * (self.__n - k) for k in range(self.__n)]
+        for j in range(self.__n):
+            inicio_coluna = j * (j + 1) // 2
+            for i in range(j + 1):
+                M[i][j] = celulas[inicio_coluna + i]
+        return M
+
+
+class ArmazenamentoEsparso(Armazenamento):
+    '''
+    Dicionário de dicionários: para cada vértice, um dicionário que associa cada vizinho à quantidade de arestas entre eles.
+    Ocupa memória proporcional a V+E e continua podendo ser alterado.
+    '''
+
+    def __init__(self, n=0):
+        self.adjacencia = [dict() for _ in range(n)]
+
+    def __len__(self):
+        return len(self.adjacencia)
+
+    def adiciona_vertice(self):
+        self.adjacencia.append(dict())
+
+    def multiplicidade(self, i: int, j: int):
+        return self.adjacencia[i].get(j, 0)
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        q = self.adjacencia[i].get(j, 0) + delta
+        if q > 0:
+            self.adjacencia[i][j] = q
+            self.adjacencia[j][i] = q
+        else:
+            self.adjacencia[i].pop(j, None)
+            self.adjacencia[j].pop(i, None)
+
+    def vizinhos(self, i: int):
+        return sorted(self.adjacencia[i].items())
+
+
+class ArmazenamentoCSR(Armazenamento):
+    '''
+    Formato compressed sparse row, somente leitura: os vizinhos de todos os vértices ficam em sequência, ordenados, num único
+    array, e os vizinhos do vértice i ocupam as posições inicio[i] até inicio[i+1]-1.
+    Usado para grafos congelados (ver Grafo.congela).
+    '''
+
+    def __init__(self, n=0):
+        self.inicio = array('l', [0] * (n + 1))
+        self.vizinho = array('l')
+        self.quantidade = array('l')
+
+    @classmethod
+    def de_armazenamento(cls, outro: Armazenamento):
+        '''
+        Constrói a versão congelada de um outro armazenamento, em tempo O(V+E) (mais a ordenação dos vizinhos, se o outro
+        armazenamento não os fornecer ordenados).
+        '''
+        csr = cls()
+        for i in range(len(outro)):
+            for j, q in outro.vizinhos(i):
+                csr.vizinho.append(j)
+                csr.quantidade.append(q)
+            csr.inicio.append(len(csr.vizinho))
+        return csr
+
+    def __len__(self):
+        return len(self.inicio) - 1
+
+    def adiciona_vertice(self):
+        raise GrafoCongeladoException('O grafo está congelado e não pode receber vértices')
+
+    def multiplicidade(self, i: int, j: int):
+        inicio, fim = self.inicio[i], self.inicio[i + 1]
+        k = bisect_left(self.vizinho, j, inicio, fim)
+        if k < fim and self.vizinho[k] == j:
+            return self.quantidade[k]
+        return 0
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        raise GrafoCongeladoException('O grafo está congelado e não pode ter arestas alteradas')
+
+    def vizinhos(self, i: int):
+        inicio, fim = self.inicio[i], self.inicio[i + 1]
+        return list(zip(self.vizinho[inicio:fim], self.quantidade[inicio:fim]))
+
+
+class ArmazenamentoNumPy(Armazenamento):
+    '''
+    Matriz de adjacência densa guardada num array NumPy de uint16, triangular superior (os elementos abaixo da diagonal
+    principal ficam zerados). Grau, completude, pares não adjacentes e contagem de arestas viram reduções vetorizadas.
+    Precisa do pacote numpy, que é opcional para o restante do módulo.
+    '''
+
+    def __init__(self, n=0):
+        if np is None:
+            raise ImportError('O ArmazenamentoNumPy precisa do pacote numpy')
+        self.__n = n
+        self.__dados = np.zeros((max(n, 1), max(n, 1)), dtype=np.uint16)
+
+    @property
+    def M(self):
+        '''
+        A parte da matriz que está em uso (uma view, sem cópia)
+        '''
+        return self.__dados[:self.__n, :self.__n]
+
+    def __len__(self):
+        return self.__n
+
+    def adiciona_vertice(self):
+        # A capacidade dobra quando acaba, para que adicionar V vértices custe O(V²) no total
+        if self.__n == len(self.__dados):
+            dados = np.zeros((2 * self.__n, 2 * self.__n), dtype=np.uint16)
+            dados[:self.__n, :self.__n] = self.M
+            self.__dados = dados
+        self.__n += 1
+
+    def multiplicidade(self, i: int, j: int):
+        if i > j:
+            i, j = j, i
+        return int(self.__dados[i, j])
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        if i > j:
+            i, j = j, i
+        self.__dados[i, j] = int(self.__dados[i, j]) + delta
+
+    def vizinhos(self, i: int):
+        M = self.M
+        coluna = M[:i, i]
+        linha = M[i, i:]
+        lista = [(int(j), int(coluna[j])) for j in np.flatnonzero(coluna)]
+        lista.extend((int(j) + i, int(linha[j])) for j in np.flatnonzero(linha))
+        return lista
+
+    def grau(self, i: int):
+        M = self.M
+        return int(M[i, i:].sum() + M[:i, i].sum())
+
+    def completo(self):
+        n = self.__n
+        return bool(np.count_nonzero(np.triu(self.M, 1)) == n * (n - 1) // 2)
+
+    def pares_nao_adjacentes(self):
+        linhas, colunas = np.nonzero(np.triu(self.M == 0))
+        return list(zip(linhas.tolist(), colunas.tolist()))
+
+    def quantidade_de_pares(self, multiplicidade: int):
+        return int(np.count_nonzero(self.M == multiplicidade))
+
+    def matriz(self):
+        M = self.M.tolist()
+        for k in range(len(M)):
+            M[k][:k] = ['-'] * k
+        return M
+
+
 class Grafo:
 
     QTDE_MAX_SEPARADOR = 1
     SEPARADOR_ARESTA = '-'
     __maior_vertice = 0
 
-    def __init__(self, V=None, M=None):
+    def __init__(self, V=None, M=None, armazenamento=ArmazenamentoMatriz):
         '''
         Constrói um objeto do tipo Grafo. Se nenhum parâmetro for passado, cria um Grafo vazio.
         Se houver alguma aresta ou algum vértice inválido, uma exceção é lançada.
         :param V: Uma lista dos vértices (ou nodos) do grafo.
         :param V: Uma matriz de adjacência que guarda as arestas do grafo. Cada entrada da matriz tem um inteiro que indica a quantidade de arestas que ligam aqueles vértices
+        :param armazenamento: A classe usada para guardar as arestas: ArmazenamentoMatriz (matriz densa compactada, o padrão), ArmazenamentoNumPy (matriz densa vetorizada, requer numpy) ou ArmazenamentoEsparso (memória proporcional a V+E). Um grafo pronto pode ser congelado no formato CSR com congela()
         '''
 
         if V == None:
@@ -35,39 +367,45 @@ class Grafo:
                 self.__maior_vertice = len(v)
 
         self.N = list(V)
+        self.__indices = {v: i for i, v in enumerate(self.N)}
+        self.__armazenamento = armazenamento(len(self.N))
 
-        if M == []:
-            for k in range(len(V)):
-                M.append(list())
-                for l in range(len(V)):
-                    if k>l:
-                        M[k].append('-')
-                    else:
-                        M[k].append(0)
-
-
-        if len(M) != len(V):
-            raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
-
-        for c in M:
-            if len(c) != len(V):
+        # Como os vértices já foram validados, qualquer par deles forma uma aresta válida; só a matriz precisa ser verificada
+        if M != []:
+            if len(M) != len(V):
                 raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
 
-        for i in range(len(V)):
-            for j in range(len(V)):
-                '''
-                Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
-                Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
-                '''
-                if i>j and not(M[i][j] == '-'):
-                    raise MatrizInvalidaException('A matriz não representa uma matriz não direcionada')
+            for c in M:
+                if len(c) != len(V):
+                    raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
 
+            for i in range(len(V)):
+                for j in range(len(V)):
+                    '''
+                    Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
+                    Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
+                    '''
+                    if i>j and not(M[i][j] == '-'):
+                        raise MatrizInvalidaException('A matriz não representa uma matriz não direcionada')
 
-                aresta = V[i] + Grafo.SEPARADOR_ARESTA + V[j]
-                if not(self.arestaValida(aresta)):
-                    raise ArestaInvalidaException('A aresta ' + aresta + ' é inválida')
+                    if i<=j and M[i][j]:
+                        self.__armazenamento.altera_multiplicidade(i, j, M[i][j])
 
-        self.M = list(M)
+    @property
+    def M(self):
+        '''
+        A matriz de adjacência do grafo, no mesmo formato da que é passada ao construtor. É uma cópia nova a cada acesso,
+        então alterá-la não altera o grafo: para incluir ou retirar arestas, use adicionaAresta e remove_aresta.
+        Como as arestas ficam no armazenamento, a cópia custa O(V²) em tempo e memória mesmo nos armazenamentos esparsos.
+        '''
+        return self.__armazenamento.matriz()
+
+    def congela(self):
+        '''
+        Converte o armazenamento das arestas para o formato CSR, compacto e somente leitura.
+        Depois disso, adicionar vértices ou adicionar e remover arestas lança GrafoCongeladoException.
+        '''
+        self.__armazenamento = ArmazenamentoCSR.de_armazenamento(self.__armazenamento)
 
     def arestaValida(self, aresta=''):
         '''
@@ -113,39 +451,28 @@ class Grafo:
         :param vertice: O vértice que deve ser verificado.
         :return: Um valor booleano que indica se o vértice existe no grafo.
         '''
-        return Grafo.verticeValido(vertice) and self.N.count(vertice) > 0
-
-    def __primeiro_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o vértice X
-        :param a: a aresta a ser analisada
-        :return: O primeiro vértice da aresta
-        '''
-        return a[0:a.index(Grafo.SEPARADOR_ARESTA)]
+        return Grafo.verticeValido(vertice) and vertice in self.__indices
 
-    def __segundo_vertice_aresta(self, a: str):
+    def indice_vertice(self, v: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o vértice Y
-        :param a: A aresta a ser analisada
-        :return: O segundo vértice da aresta
+        Retorna o identificador inteiro de um vértice, que é a sua posição na lista de vértices e na matriz.
+        :param v: O vértice cujo identificador se deseja
+        :return: O índice do vértice na lista de vértices
+        :raises VerticeInvalidoException se o vértice não existir no grafo.
         '''
-        return a[a.index(Grafo.SEPARADOR_ARESTA)+1:]
+        if v not in self.__indices:
+            raise VerticeInvalidoException('O vértice {} não existe'.format(v))
+        return self.__indices[v]
 
-    def __indice_primeiro_vertice_aresta(self, a: str):
+    def __indices_aresta(self, a: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice X na lista de vértices
+        Dada uma aresta no formato X-Y, retorna os índices dos vértices X e Y na lista de vértices,
+        separando o string uma única vez
         :param a: A aresta a ser analisada
-        :return: O índice do primeiro vértice da aresta na lista de vértices
+        :return: Uma tupla com os índices do primeiro e do segundo vértice da aresta
         '''
-        return self.N.index(self.__primeiro_vertice_aresta(a))
-
-    def __indice_segundo_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice Y na lista de vértices
-        :param a: A aresta a ser analisada
-        :return: O índice do segundo vértice da aresta na lista de vértices
-        '''
-        return self.N.index(self.__segundo_vertice_aresta(a))
+        v1, _, v2 = a.partition(Grafo.SEPARADOR_ARESTA)
+        return self.__indices[v1], self.__indices[v2]
 
     def existeAresta(self, a: str):
         '''
@@ -153,14 +480,21 @@ class Grafo:
         :param aresta: A aresta a ser verificada
         :return: Um valor booleano que indica se a aresta existe no grafo.
         '''
-        existe = False
-        if Grafo.arestaValida(self, a):
-            for i in range(len(self.M)):
-                for j in range(len(self.M)):
-                    if self.M[self.__indice_primeiro_vertice_aresta(a)][self.__indice_segundo_vertice_aresta(a)]:
-                        existe = True
+        if not Grafo.arestaValida(self, a):
+            return False
+        i_a1, i_a2 = self.__indices_aresta(a)
+        if i_a1 > i_a2:
+            i_a1, i_a2 = i_a2, i_a1 # Só a parte acima da diagonal principal guarda as arestas
+        return self.__armazenamento.multiplicidade(i_a1, i_a2) > 0
 
-        return existe
+    def existem_arestas(self, arestas):
+        '''
+        Verifica de uma só vez se cada aresta de uma coleção pertence ao grafo.
+        :param arestas: Um iterável de arestas no formato X-Y
+        :return: Uma lista de valores booleanos, na mesma ordem das arestas recebidas
+        '''
+        existe = self.existeAresta
+        return [existe(a) for a in arestas]
 
     def adicionaVertice(self, v):
         '''
@@ -168,22 +502,17 @@ class Grafo:
         :param v: O vértice a ser incluído no grafo.
         :raises VerticeInvalidoException se o vértice já existe ou se ele não estiver no formato válido.
         '''
-        if v in self.N:
+        if v in self.__indices:
             raise VerticeInvalidoException('O vértice {} já existe'.format(v))
 
         if self.verticeValido(v):
+            self.__armazenamento.adiciona_vertice() # Adiciona a linha e a coluna do vértice
+
             if len(v) > self.__maior_vertice:
                 self.__maior_vertice = len(v)
 
             self.N.append(v) # Adiciona vértice na lista de vértices
-            self.M.append([]) # Adiciona a linha
-
-            for k in range(len(self.N)):
-                if k != len(self.N) -1:
-                    self.M[k].append(0) # adiciona os elementos da coluna do vértice
-                    self.M[self.N.index(v)].append('-') # adiciona os elementos da linha do vértice
-                else:
-                    self.M[self.N.index(v)].append(0)  # adiciona um zero no último elemento da linha
+            self.__indices[v] = len(self.N) - 1
         else:
             raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
@@ -194,15 +523,25 @@ class Grafo:
         :raise: lança uma exceção caso a aresta não estiver em um formato válido
         '''
         if self.arestaValida(a):
-            i_a1 = self.__indice_primeiro_vertice_aresta(a)
-            i_a2 = self.__indice_segundo_vertice_aresta(a)
-            if i_a1 < i_a2:
-                self.M[i_a1][i_a2] += 1
-            else:
-                self.M[i_a2][i_a1] += 1
+            self.__adiciona_aresta_indices(*self.__indices_aresta(a))
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
+    def adiciona_aresta_ids(self, i: int, j: int):
+        '''
+        Adiciona uma aresta ao grafo a partir dos identificadores inteiros dos seus vértices (ver indice_vertice),
+        sem precisar montar nem interpretar o string X-Y
+        :param i: O índice do primeiro vértice da aresta
+        :param j: O índice do segundo vértice da aresta
+        :raise: lança uma exceção caso algum dos índices não corresponda a um vértice do grafo
+        '''
+        if not (0 <= i < len(self.N) and 0 <= j < len(self.N)):
+            raise ArestaInvalidaException('A aresta ({}, {}) é inválida'.format(i, j))
+        self.__adiciona_aresta_indices(i, j)
+
+    def __adiciona_aresta_indices(self, i_a1: int, i_a2: int):
+        self.__armazenamento.altera_multiplicidade(i_a1, i_a2, 1)
+
     def remove_aresta(self, a):
         '''
         Remove uma aresta ao grafo no formato X-Y, onde X é o primeiro vértice e Y é o segundo vértice
@@ -211,78 +550,93 @@ class Grafo:
         '''
         if self.arestaValida(a):
             if self.existeAresta(a):
-                i_a1 = self.__indice_primeiro_vertice_aresta(a)
-                i_a2 = self.__indice_segundo_vertice_aresta(a)
-                if i_a1 < i_a2:
-                    self.M[i_a1][i_a2] -= 1
-                else:
-                    self.M[i_a2][i_a1] -= 1
+                i_a1, i_a2 = self.__indices_aresta(a)
+                self.__armazenamento.altera_multiplicidade(i_a1, i_a2, -1)
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
 
 
+    def vizinhos_em_comum(self, u, v):
+        '''
+        Retorna os vértices adjacentes tanto a u quanto a v, pela interseção dos conjuntos de bits das duas vizinhanças.
+        :param u: O primeiro vértice
+        :param v: O segundo vértice
+        :return: Uma lista com os vértices adjacentes a u e a v, na ordem da lista de vértices
+        '''
+        bits = self.__armazenamento.linha_bits(self.indice_vertice(u)) & self.__armazenamento.linha_bits(self.indice_vertice(v))
+        return [self.N[j] for j in Armazenamento.indices_dos_bits(bits)]
+
+    def vizinhanca(self, vertices):
+        '''
+        Retorna os vértices adjacentes a pelo menos um dos vértices dados, pela união dos conjuntos de bits das vizinhanças.
+        :param vertices: Um iterável de vértices
+        :return: Uma lista com os vértices da vizinhança, na ordem da lista de vértices
+        '''
+        bits = 0
+        for v in vertices:
+            bits |= self.__armazenamento.linha_bits(self.indice_vertice(v))
+        return [self.N[j] for j in Armazenamento.indices_dos_bits(bits)]
+
+    def alcancaveis(self, v):
+        '''
+        Retorna os vértices alcançáveis a partir de v (incluindo o próprio v) por uma busca em largura em que cada nível
+        é expandido de uma só vez, unindo os conjuntos de bits das vizinhanças da fronteira.
+        :param v: O vértice de partida
+        :return: Uma lista com os vértices alcançáveis, na ordem da lista de vértices
+        '''
+        alcancados = fronteira = 1 << self.indice_vertice(v)
+        while fronteira:
+            proxima = 0
+            for i in Armazenamento.indices_dos_bits(fronteira):
+                proxima |= self.__armazenamento.linha_bits(i)
+            fronteira = proxima & ~alcancados
+            alcancados |= fronteira
+        return [self.N[j] for j in Armazenamento.indices_dos_bits(alcancados)]
+
     def vertices_nao_adjacentes(self):
         lista=[]
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j] == 0 :
-                    lista.append(self.N[i]+self.SEPARADOR_ARESTA+self.N[j])
+        for i, j in self.__armazenamento.pares_nao_adjacentes():
+            lista.append(self.N[i]+self.SEPARADOR_ARESTA+self.N[j])
 
         return lista
 
     def ha_laco(self):
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j] != 0 and self.M[i][j] != self.SEPARADOR_ARESTA and self.N[i] == self.N[j]:
-                    return True
+        for i in range(len(self.N)):
+            if self.__armazenamento.multiplicidade(i, i) > 0:
+                return True
+        return False
 
 
     def ha_paralelas(self):
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]==2:
+        for i in range(len(self.N)):
+            for j, q in self.__armazenamento.vizinhos(i):
+                if q > 1:
                     return True
+        return False
 
 
 
     def grau(self,v):
-        c=0
-        n=0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]!=self.SEPARADOR_ARESTA:
-                    n=int(self.M[i][j])
-                    if n>=1 and self.N[i]==v or self.N[j]==v:
-                        c+=n
-        return c
+        return self.__armazenamento.grau(self.indice_vertice(v))
 
 
     def arestas_sobre_vertice(self,v):
         lista=[]
-        n=0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]!=self.SEPARADOR_ARESTA:
-                    n=int(self.M[i][j])
-                    if ( (n >= 1) and (self.N[i] == v or self.N[j] == v) ):
-                        for c in range(n):
-                            lista.append(self.N[i] + self.SEPARADOR_ARESTA + self.N[j])
+        i_v = self.indice_vertice(v)
+        for j, q in self.__armazenamento.vizinhos(i_v):
+            # A aresta é escrita na ordem em que aparece na matriz: o vértice de menor índice primeiro
+            if j < i_v:
+                aresta = self.N[j] + self.SEPARADOR_ARESTA + v
+            else:
+                aresta = v + self.SEPARADOR_ARESTA + self.N[j]
+            for c in range(q):
+                lista.append(aresta)
 
         return lista
 
     def eh_completo(self):
-        tamanho = []
-        lista_m = []
-        for i in range(len(self.M)):
-            tamanho.append(i)
-            for j in range(len(self.M[i])):
-                if i == j:
-                    if self.M[i + 1][j + 1] == 1:
-                        lista_m.append(self.M[i][j])
-        if (lista_m == (tamanho - 1)):
-            return True
-        return False
+        return self.__armazenamento.completo()
 
 
 
@@ -310,10 +664,15 @@ class Grafo:
 
         grafo_str += '\n'
 
-        for l in range(len(self.M)):
+        # Monta uma linha da matriz por vez, direto do armazenamento, em vez de montar a matriz inteira
+        for l in range(len(self.N)):
+            linha = ['-'] * l + [0] * (len(self.N) - l)
+            for c, q in self.__armazenamento.vizinhos(l):
+                if c >= l:
+                    linha[c] = q
             grafo_str += self.N[l] + ' '
-            for c in range(len(self.M)):
-                grafo_str += str(self.M[l][c]) + ' '
+            for c in range(len(linha)):
+                grafo_str += str(linha[c]) + ' '
             grafo_str += '\n'
 
         return grafo_str
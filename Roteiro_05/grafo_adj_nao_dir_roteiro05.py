@@ -1,4 +1,14 @@
 # -*- coding: utf-8 -*-
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class VerticeInvalidoException(Exception):
     pass
@@ -9,18 +19,445 @@ class ArestaInvalidaException(Exception):
 class MatrizInvalidaException(Exception):
     pass
 
+class GrafoCongeladoException(Exception):
+    pass
+
+
+class Armazenamento:
+    '''
+    Forma de guardar as arestas de um grafo não direcionado. Os vértices são identificados pelos seus índices (de 0 a V-1)
+    e cada par de vértices guarda a quantidade de arestas que os ligam.
+    As subclasses precisam implementar __len__, adiciona_vertice, multiplicidade, altera_multiplicidade e vizinhos;
+    as demais consultas têm uma implementação genérica baseada em vizinhos, que pode ser substituída por uma mais rápida.
+    '''
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def adiciona_vertice(self):
+        '''
+        Acrescenta um vértice isolado, cujo índice é o número de vértices anterior.
+        '''
+        raise NotImplementedError
+
+    def multiplicidade(self, i: int, j: int):
+        '''
+        :return: A quantidade de arestas que ligam os vértices i e j, em qualquer ordem
+        '''
+        raise NotImplementedError
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        '''
+        Soma delta à quantidade de arestas que ligam os vértices i e j.
+        '''
+        raise NotImplementedError
+
+    def vizinhos(self, i: int):
+        '''
+        :return: Uma lista de tuplas (j, quantidade de arestas entre i e j), ordenada por j, só com os vértices adjacentes a i
+        '''
+        raise NotImplementedError
+
+    def grau(self, i: int):
+        '''
+        :return: A quantidade de arestas incidentes sobre o vértice i (um laço conta uma vez)
+        '''
+        return sum(q for _, q in self.vizinhos(i))
+
+    def linha_bits(self, i: int):
+        '''
+        :return: A vizinhança do vértice i como um conjunto de bits guardado num inteiro: o bit j vale 1 se i e j são adjacentes
+        '''
+        bits = 0
+        for j, _ in self.vizinhos(i):
+            bits |= 1 << j
+        return bits
+
+    @staticmethod
+    def indices_dos_bits(bits: int):
+        '''
+        Percorre, do menor para o maior, os índices dos bits que valem 1 num conjunto de bits
+        '''
+        while bits:
+            menor = bits & -bits
+            yield menor.bit_length() - 1
+            bits ^= menor
+
+    def completo(self):
+        '''
+        :return: Um valor booleano que indica se todo par de vértices distintos é ligado por ao menos uma aresta
+        '''
+        n = len(self)
+        todos = (1 << n) - 1
+        for i in range(n):
+            if self.linha_bits(i) | (1 << i) != todos:
+                return False
+        return True
+
+    def pares_nao_adjacentes(self):
+        '''
+        :return: Uma lista de tuplas (i, j), com i <= j, dos pares de vértices sem arestas entre si, na ordem das linhas da matriz
+        '''
+        pares = []
+        n = len(self)
+        todos = (1 << n) - 1
+        for i in range(n):
+            # Os bits j >= i que não estão na vizinhança de i
+            livres = ~self.linha_bits(i) & todos & ~((1 << i) - 1)
+            pares.extend((i, j) for j in self.indices_dos_bits(livres))
+        return pares
+
+    def quantidade_de_pares(self, multiplicidade: int):
+        '''
+        :return: A quantidade de pares de vértices (incluindo laços) ligados por exatamente "multiplicidade" arestas, com multiplicidade > 0
+        '''
+        quantidade = 0
+        for i in range(len(self)):
+            for j, q in self.vizinhos(i):
+                if i <= j and q == multiplicidade:
+                    quantidade += 1
+        return quantidade
+
+    def matriz(self):
+        '''
+        Monta a matriz de adjacência no formato usado pelo Grafo: a quantidade de arestas acima da diagonal principal
+        (incluindo a diagonal) e um traço "-" abaixo dela.
+        '''
+        n = len(self)
+        M = [['-'] * k + [0] * (n - k) for k in range(n)]
+        for i in range(n):
+            for j, q in self.vizinhos(i):
+                if i <= j:
+                    M[i][j] = q
+        return M
+
+
+class ArmazenamentoMatriz(Armazenamento):
+    '''
+    Matriz de adjacência densa, guardando só a diagonal principal e os elementos acima dela (os que ficam abaixo seriam
+    sempre um traço "-"). As V(V+1)/2 células ficam num único array('H'), coluna a coluna: o elemento (i, j), com i <= j,
+    fica na posição j(j+1)/2 + i. Assim, adicionar um vértice só acrescenta a sua coluna no fim do array, em O(V).
+    '''
+
+    def __init__(self, n=0):
+        self.__n = n
+        self.__celulas = array('H', [0]) * (n * (n + 1) // 2)
+        self.__bits = [0] * n # A vizinhança de cada vértice como conjunto de bits (ver linha_bits)
+
+    def __posicao(self, i: int, j: int):
+        if i > j:
+            i, j = j, i
+        return j * (j + 1) // 2 + i
+
+    def __len__(self):
+        return self.__n
+
+    def adiciona_vertice(self):
+        self.__celulas.extend(array('H', [0]) * (self.__n + 1)) # adiciona a coluna do vértice
+        self.__bits.append(0)
+        self.__n += 1
+
+    def multiplicidade(self, i: int, j: int):
+        return self.__celulas[self.__posicao(i, j)]
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        posicao = self.__posicao(i, j)
+        self.__celulas[posicao] += delta
+        if self.__celulas[posicao]:
+            self.__bits[i] |= 1 << j
+            self.__bits[j] |= 1 << i
+        else:
+            self.__bits[i] &= ~(1 << j)
+            self.__bits[j] &= ~(1 << i)
+
+    def linha_bits(self, i: int):
+        return self.__bits[i]
+
+    def vizinhos(self, i: int):
+        celulas = self.__celulas
+        # Percorre só os bits da linha i, em vez de varrer a coluna inteira
+        lista = []
+        for j in Armazenamento.indices_dos_bits(self.__bits[i]):
+            if j <= i:
+                lista.append((j, celulas[i * (i + 1) // 2 + j]))
+            else:
+                lista.append((j, celulas[j * (j + 1) // 2 + i]))
+        return lista
+
+    def matriz(self):
+        celulas = self.__celulas
+        M = [['-'] * k + [0] * (self.__n - k) for k in range(self.__n)]
+        for j in range(self.__n):
+            inicio_coluna = j * (j + 1) // 2
+            for i in range(j + 1):
+                M[i][j] = celulas[inicio_coluna + i]
+        return M
+
+
+class ArmazenamentoEsparso(Armazenamento):
+    '''
+    Dicionário de dicionários: para cada vértice, um dicionário que associa cada vizinho à quantidade de arestas entre eles.
+    Ocupa memória proporcional a V+E e continua podendo ser alterado.
+    '''
+
+    def __init__(self, n=0):
+        self.adjacencia = [dict() for _ in range(n)]
+
+    def __len__(self):
+        return len(self.adjacencia)
+
+    def adiciona_vertice(self):
+        self.adjacencia.append(dict())
+
+    def multiplicidade(self, i: int, j: int):
+        return self.adjacencia[i].get(j, 0)
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        q = self.adjacencia[i].get(j, 0) + delta
+        if q > 0:
+            self.adjacencia[i][j] = q
+            self.adjacencia[j][i] = q
+        else:
+            self.adjacencia[i].pop(j, None)
+            self.adjacencia[j].pop(i, None)
+
+    def vizinhos(self, i: int):
+        return sorted(self.adjacencia[i].items())
+
+
+class ArmazenamentoCSR(Armazenamento):
+    '''
+    Formato compressed sparse row, somente leitura: os vizinhos de todos os vértices ficam em sequência, ordenados, num único
+    array, e os vizinhos do vértice i ocupam as posições inicio[i] até inicio[i+1]-1.
+    Usado para grafos congelados (ver Grafo.congela).
+    '''
+
+    def __init__(self, n=0):
+        self.inicio = array('l', [0] * (n + 1))
+        self.vizinho = array('l')
+        self.quantidade = array('l')
+
+    @classmethod
+    def de_armazenamento(cls, outro: Armazenamento):
+        '''
+        Constrói a versão congelada de um outro armazenamento, em tempo O(V+E) (mais a ordenação dos vizinhos, se o outro
+        armazenamento não os fornecer ordenados).
+        '''
+        csr = cls()
+        for i in range(len(outro)):
+            for j, q in outro.vizinhos(i):
+                csr.vizinho.append(j)
+                csr.quantidade.append(q)
+            csr.inicio.append(len(csr.vizinho))
+        return csr
+
+    def __len__(self):
+        return len(self.inicio) - 1
+
+    def adiciona_vertice(self):
+        raise GrafoCongeladoException('O grafo está congelado e não pode receber vértices')
+
+    def multiplicidade(self, i: int, j: int):
+        inicio, fim = self.inicio[i], self.inicio[i + 1]
+        k = bisect_left(self.vizinho, j, inicio, fim)
+        if k < fim and self.vizinho[k] == j:
+            return self.quantidade[k]
+        return 0
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        raise GrafoCongeladoException('O grafo está congelado e não pode ter arestas alteradas')
+
+    def vizinhos(self, i: int):
+        inicio, fim = self.inicio[i], self.inicio[i + 1]
+        return list(zip(self.vizinho[inicio:fim], self.quantidade[inicio:fim]))
+
+
+class ArmazenamentoNumPy(Armazenamento):
+    '''
+    Matriz de adjacência densa guardada num array NumPy de uint16, triangular superior (os elementos abaixo da diagonal
+    principal ficam zerados). Grau, completude, pares não adjacentes e contagem de arestas viram reduções vetorizadas.
+    Precisa do pacote numpy, que é opcional para o restante do módulo.
+    '''
+
+    def __init__(self, n=0):
+        if np is None:
+            raise ImportError('O ArmazenamentoNumPy precisa do pacote numpy')
+        self.__n = n
+        self.__dados = np.zeros((max(n, 1), max(n, 1)), dtype=np.uint16)
+
+    @property
+    def M(self):
+        '''
+        A parte da matriz que está em uso (uma view, sem cópia)
+        '''
+        return self.__dados[:self.__n, :self.__n]
+
+    def __len__(self):
+        return self.__n
+
+    def adiciona_vertice(self):
+        # A capacidade dobra quando acaba, para que adicionar V vértices custe O(V²) no total
+        if self.__n == len(self.__dados):
+            dados = np.zeros((2 * self.__n, 2 * self.__n), dtype=np.uint16)
+            dados[:self.__n, :self.__n] = self.M
+            self.__dados = dados
+        self.__n += 1
+
+    def multiplicidade(self, i: int, j: int):
+        if i > j:
+            i, j = j, i
+        return int(self.__dados[i, j])
+
+    def altera_multiplicidade(self, i: int, j: int, delta: int):
+        if i > j:
+            i, j = j, i
+        self.__dados[i, j] = int(self.__dados[i, j]) + delta
+
+    def vizinhos(self, i: int):
+        M = self.M
+        coluna = M[:i, i]
+        linha = M[i, i:]
+        lista = [(int(j), int(coluna[j])) for j in np.flatnonzero(coluna)]
+        lista.extend((int(j) + i, int(linha[j])) for j in np.flatnonzero(linha))
+        return lista
+
+    def grau(self, i: int):
+        M = self.M
+        return int(M[i, i:].sum() + M[:i, i].sum())
+
+    def completo(self):
+        n = self.__n
+        return bool(np.count_nonzero(np.triu(self.M, 1)) == n * (n - 1) // 2)
+
+    def pares_nao_adjacentes(self):
+        linhas, colunas = np.nonzero(np.triu(self.M == 0))
+        return list(zip(linhas.tolist(), colunas.tolist()))
+
+    def quantidade_de_pares(self, multiplicidade: int):
+        return int(np.count_nonzero(self.M == multiplicidade))
+
+    def matriz(self):
+        M = self.M.tolist()
+        for k in range(len(M)):
+            M[k][:k] = ['-'] * k
+        return M
+
+
+def _caminho_viavel(adjacencia, visitados, ultimo, inicio):
+    '''
+    Verifica se um caminho que começa em inicio, termina em ultimo e visita o conjunto de bits visitados ainda pode ser
+    completado até um ciclo hamiltoniano. Se todos os vértices já foram visitados, verifica se ultimo fecha o ciclo. Senão,
+    o caminho é descartado se algum vértice não visitado ficar com menos de dois vizinhos livres, se o início não tiver
+    mais vizinhos livres para fechar o ciclo ou se os vértices não visitados deixarem de ser alcançáveis a partir de ultimo.
+    '''
+    restantes = ((1 << len(adjacencia)) - 1) & ~visitados
+    if not restantes:
+        return adjacencia[ultimo] >> inicio & 1 == 1
+    if not adjacencia[inicio] & restantes:
+        return False
+    livres = restantes | (1 << ultimo) | (1 << inicio)
+    bits = restantes
+    while bits:
+        menor = bits & -bits
+        bits ^= menor
+        if bin(adjacencia[menor.bit_length() - 1] & livres).count('1') < 2:
+            return False
+    # Os vértices restantes precisam ser alcançáveis a partir do último vértice, andando só por eles
+    alcance = 0
+    fronteira = adjacencia[ultimo] & restantes
+    while fronteira:
+        alcance |= fronteira
+        proxima = 0
+        while fronteira:
+            menor = fronteira & -fronteira
+            fronteira ^= menor
+            proxima |= adjacencia[menor.bit_length() - 1]
+        fronteira = proxima & restantes & ~alcance
+    return alcance == restantes
+
+
+def _busca_ciclo_hamiltoniano(adjacencia, caminho, prazo=None, parar=None):
+    '''
+    Busca com retrocesso, sem recursão, de um ciclo hamiltoniano que comece pelos vértices de caminho.
+    Os próximos vértices são tentados do que tem menos vizinhos livres para o que tem mais, e os ramos inviáveis são
+    cortados por _caminho_viavel. Fica fora da classe Grafo para poder ser enviada a outros processos.
+    :param adjacencia: A vizinhança de cada vértice como conjunto de bits, sem laços
+    :param caminho: Os índices dos vértices já fixados no início do ciclo
+    :param prazo: O instante (de time.monotonic) em que a busca desiste, ou None para não ter limite
+    :param parar: Um evento (como threading.Event) que, se for marcado, faz a busca desistir, ou None
+    :return: A lista dos índices dos vértices do ciclo, False se não houver ciclo começando por caminho, ou None se a busca desistir
+    '''
+    n = len(adjacencia)
+    todos = (1 << n) - 1
+    inicio = caminho[0]
+    caminho = list(caminho)
+    visitados = 0
+    for v in caminho:
+        visitados |= 1 << v
+
+    def candidatos(visitados, ultimo):
+        livres = todos & ~visitados
+        lista = []
+        bits = adjacencia[ultimo] & livres
+        while bits:
+            menor = bits & -bits
+            bits ^= menor
+            lista.append(menor.bit_length() - 1)
+        # O último da lista é o primeiro a ser tentado: o vértice com menos vizinhos livres
+        lista.sort(key=lambda w: bin(adjacencia[w] & livres).count('1'), reverse=True)
+        return lista
+
+    if not _caminho_viavel(adjacencia, visitados, caminho[-1], inicio):
+        return False
+    if visitados == todos:
+        return caminho
+
+    if (prazo != None and time.monotonic() > prazo) or (parar != None and parar.is_set()):
+        return None
+
+    pilha = [candidatos(visitados, caminho[-1])]
+    contador = 0
+    while pilha:
+        contador += 1
+        if contador % 1024 == 0:
+            if prazo != None and time.monotonic() > prazo:
+                return None
+            if parar != None and parar.is_set():
+                return None
+        proximos = pilha[-1]
+        if not proximos:
+            pilha.pop()
+            if len(pilha) > 0:
+                visitados ^= 1 << caminho.pop()
+            continue
+        w = proximos.pop()
+        visitados |= 1 << w
+        caminho.append(w)
+        if _caminho_viavel(adjacencia, visitados, w, inicio):
+            if visitados == todos:
+                return caminho
+            pilha.append(candidatos(visitados, w))
+        else:
+            visitados ^= 1 << w
+            caminho.pop()
+
+    return False
+
+
 class Grafo:
 
     QTDE_MAX_SEPARADOR = 1
     SEPARADOR_ARESTA = '-'
+    MAX_VERTICES_HELD_KARP = 20 # Acima disso, ciclo_hamiltoniano usa busca com retrocesso em vez de programação dinâmica
     __maior_vertice = 0
 
-    def __init__(self, V=None, M=None):
+    def __init__(self, V=None, M=None, armazenamento=ArmazenamentoMatriz):
         '''
         Constrói um objeto do tipo Grafo. Se nenhum parâmetro for passado, cria um Grafo vazio.
         Se houver alguma aresta ou algum vértice inválido, uma exceção é lançada.
         :param V: Uma lista dos vértices (ou nodos) do grafo.
         :param V: Uma matriz de adjacência que guarda as arestas do grafo. Cada entrada da matriz tem um inteiro que indica a quantidade de arestas que ligam aqueles vértices
+        :param armazenamento: A classe usada para guardar as arestas: ArmazenamentoMatriz (matriz densa compactada, o padrão), ArmazenamentoNumPy (matriz densa vetorizada, requer numpy) ou ArmazenamentoEsparso (memória proporcional a V+E). Um grafo pronto pode ser congelado no formato CSR com congela()
         '''
 
         if V == None:
@@ -35,39 +472,45 @@ class Grafo:
                 self.__maior_vertice = len(v)
 
         self.N = list(V)
+        self.__indices = {v: i for i, v in enumerate(self.N)}
+        self.__armazenamento = armazenamento(len(self.N))
 
-        if M == []:
-            for k in range(len(V)):
-                M.append(list())
-                for l in range(len(V)):
-                    if k>l:
-                        M[k].append('-')
-                    else:
-                        M[k].append(0)
-
-
-        if len(M) != len(V):
-            raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
-
-        for c in M:
-            if len(c) != len(V):
+        # Como os vértices já foram validados, qualquer par deles forma uma aresta válida; só a matriz precisa ser verificada
+        if M != []:
+            if len(M) != len(V):
                 raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
 
-        for i in range(len(V)):
-            for j in range(len(V)):
-                '''
-                Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
-                Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
-                '''
-                if i>j and not(M[i][j] == '-'):
-                    raise MatrizInvalidaException('A matriz não representa uma matriz não direcionada')
+            for c in M:
+                if len(c) != len(V):
+                    raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
 
+            for i in range(len(V)):
+                for j in range(len(V)):
+                    '''
+                    Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
+                    Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
+                    '''
+                    if i>j and not(M[i][j] == '-'):
+                        raise MatrizInvalidaException('A matriz não representa uma matriz não direcionada')
 
-                aresta = V[i] + Grafo.SEPARADOR_ARESTA + V[j]
-                if not(self.arestaValida(aresta)):
-                    raise ArestaInvalidaException('A aresta ' + aresta + ' é inválida')
+                    if i<=j and M[i][j]:
+                        self.__armazenamento.altera_multiplicidade(i, j, M[i][j])
 
-        self.M = list(M)
+    @property
+    def M(self):
+        '''
+        A matriz de adjacência do grafo, no mesmo formato da que é passada ao construtor. É uma cópia nova a cada acesso,
+        então alterá-la não altera o grafo: para incluir ou retirar arestas, use adicionaAresta e remove_aresta.
+        Como as arestas ficam no armazenamento, a cópia custa O(V²) em tempo e memória mesmo nos armazenamentos esparsos.
+        '''
+        return self.__armazenamento.matriz()
+
+    def congela(self):
+        '''
+        Converte o armazenamento das arestas para o formato CSR, compacto e somente leitura.
+        Depois disso, adicionar vértices ou adicionar e remover arestas lança GrafoCongeladoException.
+        '''
+        self.__armazenamento = ArmazenamentoCSR.de_armazenamento(self.__armazenamento)
 
     def arestaValida(self, aresta=''):
         '''
@@ -113,39 +556,28 @@ class Grafo:
         :param vertice: O vértice que deve ser verificado.
         :return: Um valor booleano que indica se o vértice existe no grafo.
         '''
-        return Grafo.verticeValido(vertice) and self.N.count(vertice) > 0
+        return Grafo.verticeValido(vertice) and vertice in self.__indices
 
-    def __primeiro_vertice_aresta(self, a: str):
+    def indice_vertice(self, v: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o vértice X
-        :param a: a aresta a ser analisada
-        :return: O primeiro vértice da aresta
+        Retorna o identificador inteiro de um vértice, que é a sua posição na lista de vértices e na matriz.
+        :param v: O vértice cujo identificador se deseja
+        :return: O índice do vértice na lista de vértices
+        :raises VerticeInvalidoException se o vértice não existir no grafo.
         '''
-        return a[0:a.index(Grafo.SEPARADOR_ARESTA)]
+        if v not in self.__indices:
+            raise VerticeInvalidoException('O vértice {} não existe'.format(v))
+        return self.__indices[v]
 
-    def __segundo_vertice_aresta(self, a: str):
+    def __indices_aresta(self, a: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o vértice Y
+        Dada uma aresta no formato X-Y, retorna os índices dos vértices X e Y na lista de vértices,
+        separando o string uma única vez
         :param a: A aresta a ser analisada
-        :return: O segundo vértice da aresta
+        :return: Uma tupla com os índices do primeiro e do segundo vértice da aresta
         '''
-        return a[a.index(Grafo.SEPARADOR_ARESTA)+1:]
-
-    def __indice_primeiro_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice X na lista de vértices
-        :param a: A aresta a ser analisada
-        :return: O índice do primeiro vértice da aresta na lista de vértices
-        '''
-        return self.N.index(self.__primeiro_vertice_aresta(a))
-
-    def __indice_segundo_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice Y na lista de vértices
-        :param a: A aresta a ser analisada
-        :return: O índice do segundo vértice da aresta na lista de vértices
-        '''
-        return self.N.index(self.__segundo_vertice_aresta(a))
+        v1, _, v2 = a.partition(Grafo.SEPARADOR_ARESTA)
+        return self.__indices[v1], self.__indices[v2]
 
     def existeAresta(self, a: str):
         '''
@@ -153,14 +585,21 @@ class Grafo:
         :param aresta: A aresta a ser verificada
         :return: Um valor booleano que indica se a aresta existe no grafo.
         '''
-        existe = False
-        if Grafo.arestaValida(self, a):
-            for i in range(len(self.M)):
-                for j in range(len(self.M)):
-                    if self.M[self.__indice_primeiro_vertice_aresta(a)][self.__indice_segundo_vertice_aresta(a)]:
-                        existe = True
+        if not Grafo.arestaValida(self, a):
+            return False
+        i_a1, i_a2 = self.__indices_aresta(a)
+        if i_a1 > i_a2:
+            i_a1, i_a2 = i_a2, i_a1 # Só a parte acima da diagonal principal guarda as arestas
+        return self.__armazenamento.multiplicidade(i_a1, i_a2) > 0
 
-        return existe
+    def existem_arestas(self, arestas):
+        '''
+        Verifica de uma só vez se cada aresta de uma coleção pertence ao grafo.
+        :param arestas: Um iterável de arestas no formato X-Y
+        :return: Uma lista de valores booleanos, na mesma ordem das arestas recebidas
+        '''
+        existe = self.existeAresta
+        return [existe(a) for a in arestas]
 
     def adicionaVertice(self, v):
         '''
@@ -168,22 +607,17 @@ class Grafo:
         :param v: O vértice a ser incluído no grafo.
         :raises VerticeInvalidoException se o vértice já existe ou se ele não estiver no formato válido.
         '''
-        if v in self.N:
+        if v in self.__indices:
             raise VerticeInvalidoException('O vértice {} já existe'.format(v))
 
         if self.verticeValido(v):
+            self.__armazenamento.adiciona_vertice() # Adiciona a linha e a coluna do vértice
+
             if len(v) > self.__maior_vertice:
                 self.__maior_vertice = len(v)
 
             self.N.append(v) # Adiciona vértice na lista de vértices
-            self.M.append([]) # Adiciona a linha
-
-            for k in range(len(self.N)):
-                if k != len(self.N) -1:
-                    self.M[k].append(0) # adiciona os elementos da coluna do vértice
-                    self.M[self.N.index(v)].append('-') # adiciona os elementos da linha do vértice
-                else:
-                    self.M[self.N.index(v)].append(0)  # adiciona um zero no último elemento da linha
+            self.__indices[v] = len(self.N) - 1
         else:
             raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
@@ -194,15 +628,25 @@ class Grafo:
         :raise: lança uma exceção caso a aresta não estiver em um formato válido
         '''
         if self.arestaValida(a):
-            i_a1 = self.__indice_primeiro_vertice_aresta(a)
-            i_a2 = self.__indice_segundo_vertice_aresta(a)
-            if i_a1 < i_a2:
-                self.M[i_a1][i_a2] += 1
-            else:
-                self.M[i_a2][i_a1] += 1
+            self.__adiciona_aresta_indices(*self.__indices_aresta(a))
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
+    def adiciona_aresta_ids(self, i: int, j: int):
+        '''
+        Adiciona uma aresta ao grafo a partir dos identificadores inteiros dos seus vértices (ver indice_vertice),
+        sem precisar montar nem interpretar o string X-Y
+        :param i: O índice do primeiro vértice da aresta
+        :param j: O índice do segundo vértice da aresta
+        :raise: lança uma exceção caso algum dos índices não corresponda a um vértice do grafo
+        '''
+        if not (0 <= i < len(self.N) and 0 <= j < len(self.N)):
+            raise ArestaInvalidaException('A aresta ({}, {}) é inválida'.format(i, j))
+        self.__adiciona_aresta_indices(i, j)
+
+    def __adiciona_aresta_indices(self, i_a1: int, i_a2: int):
+        self.__armazenamento.altera_multiplicidade(i_a1, i_a2, 1)
+
     def remove_aresta(self, a):
         '''
         Remove uma aresta ao grafo no formato X-Y, onde X é o primeiro vértice e Y é o segundo vértice
@@ -211,68 +655,91 @@ class Grafo:
         '''
         if self.arestaValida(a):
             if self.existeAresta(a):
-                i_a1 = self.__indice_primeiro_vertice_aresta(a)
-                i_a2 = self.__indice_segundo_vertice_aresta(a)
-                if i_a1 < i_a2:
-                    self.M[i_a1][i_a2] -= 1
-                else:
-                    self.M[i_a2][i_a1] -= 1
+                i_a1, i_a2 = self.__indices_aresta(a)
+                self.__armazenamento.altera_multiplicidade(i_a1, i_a2, -1)
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
 
 
+    def vizinhos_em_comum(self, u, v):
+        '''
+        Retorna os vértices adjacentes tanto a u quanto a v, pela interseção dos conjuntos de bits das duas vizinhanças.
+        :param u: O primeiro vértice
+        :param v: O segundo vértice
+        :return: Uma lista com os vértices adjacentes a u e a v, na ordem da lista de vértices
+        '''
+        bits = self.__armazenamento.linha_bits(self.indice_vertice(u)) & self.__armazenamento.linha_bits(self.indice_vertice(v))
+        return [self.N[j] for j in Armazenamento.indices_dos_bits(bits)]
+
+    def vizinhanca(self, vertices):
+        '''
+        Retorna os vértices adjacentes a pelo menos um dos vértices dados, pela união dos conjuntos de bits das vizinhanças.
+        :param vertices: Um iterável de vértices
+        :return: Uma lista com os vértices da vizinhança, na ordem da lista de vértices
+        '''
+        bits = 0
+        for v in vertices:
+            bits |= self.__armazenamento.linha_bits(self.indice_vertice(v))
+        return [self.N[j] for j in Armazenamento.indices_dos_bits(bits)]
+
+    def alcancaveis(self, v):
+        '''
+        Retorna os vértices alcançáveis a partir de v (incluindo o próprio v) por uma busca em largura em que cada nível
+        é expandido de uma só vez, unindo os conjuntos de bits das vizinhanças da fronteira.
+        :param v: O vértice de partida
+        :return: Uma lista com os vértices alcançáveis, na ordem da lista de vértices
+        '''
+        alcancados = fronteira = 1 << self.indice_vertice(v)
+        while fronteira:
+            proxima = 0
+            for i in Armazenamento.indices_dos_bits(fronteira):
+                proxima |= self.__armazenamento.linha_bits(i)
+            fronteira = proxima & ~alcancados
+            alcancados |= fronteira
+        return [self.N[j] for j in Armazenamento.indices_dos_bits(alcancados)]
+
     def vertices_nao_adjacentes(self):
         lista=[]
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j] == 0 :
-                    lista.append(self.N[i]+self.SEPARADOR_ARESTA+self.N[j])
+        for i, j in self.__armazenamento.pares_nao_adjacentes():
+            lista.append(self.N[i]+self.SEPARADOR_ARESTA+self.N[j])
 
         return lista
 
     def ha_laco(self):
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j] != 0 and self.M[i][j] != self.SEPARADOR_ARESTA and self.N[i] == self.N[j]:
-                    return True
+        for i in range(len(self.N)):
+            if self.__armazenamento.multiplicidade(i, i) > 0:
+                return True
+        return False
 
 
     def ha_paralelas(self):
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]==2:
+        for i in range(len(self.N)):
+            for j, q in self.__armazenamento.vizinhos(i):
+                if q > 1:
                     return True
+        return False
 
 
 
     def grau(self,v):
-        c=0
-        n=0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]!=self.SEPARADOR_ARESTA:
-                    n=int(self.M[i][j])
-                    if n>=1 and self.N[i]==v or self.N[j]==v:
-                        c+=n
-        return c
+        return self.__armazenamento.grau(self.indice_vertice(v))
 
 
     def arestas_sobre_vertice(self,v):
         lista=[]
-        n=0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]!=self.SEPARADOR_ARESTA:
-                    n=int(self.M[i][j])
-                    if ( (n >= 1) and (self.N[i] == v or self.N[j] == v) ):
-                        for c in range(n):
-                            lista.append(self.N[i] + self.SEPARADOR_ARESTA + self.N[j])
+        i_v = self.indice_vertice(v)
+        for j, q in self.__armazenamento.vizinhos(i_v):
+            # A aresta é escrita na ordem em que aparece na matriz: o vértice de menor índice primeiro
+            if j < i_v:
+                aresta = self.N[j] + self.SEPARADOR_ARESTA + v
+            else:
+                aresta = v + self.SEPARADOR_ARESTA + self.N[j]
+            for c in range(q):
+                lista.append(aresta)
 
         return lista
 
-
-
     def eh_completo(self):
         '''
         Analisa a matriz levando em consideracao apenas os elementos presentes acima
@@ -280,172 +747,286 @@ class Grafo:
         eh completo
         :return: Valor booleano que indica se o grafo eh completo ou nao
         '''
-        matriz = self.M
-
-        for i in range(len(matriz)):
-            for j in range(len(matriz[i])):
-                if i - j < 0:
-                    if matriz[i][j] == 0:
-                        return False
-        return True
-
-
-    def ciclo_hamiltoniano(self):
-        v=self.N[0]
-        lista=[]
-        self.ciclo_hamiltoniano_recursiva(v,lista)
-        u=lista[-1]
-        lista_vv=self.arestas_sobre_vertice(u)
-        for i in lista_vv:
-            v1,v2= i.split(self.SEPARADOR_ARESTA)
-            if v1 or v2 == lista[0]:
-                lista.append(i)
-                lista.append(lista[0])
+        return self.__armazenamento.completo()
 
-                for i in self.N:
-                    if i not in lista:
-                        return False
-                return lista
 
+    def ciclo_hamiltoniano(self, tempo_limite=None, processos=None, profundidade=3):
+        '''
+        Procura, de forma exata, um ciclo que passe uma única vez por cada vértice do grafo.
+        Grafos com até MAX_VERTICES_HELD_KARP vértices são resolvidos pela programação dinâmica de Held-Karp sobre
+        subconjuntos de vértices representados como bits. Os maiores são resolvidos por busca com retrocesso, que corta
+        os ramos em que algum vértice ainda não visitado fica com menos de dois vizinhos livres ou em que os vértices
+        restantes deixam de ser conexos.
+        :param tempo_limite: O tempo máximo, em segundos, da busca com retrocesso. Se não for passado, a busca não tem limite
+        :param processos: Se for maior que 1, a busca com retrocesso é dividida entre essa quantidade de processos, e todos param assim que um deles encontra um ciclo
+        :param profundidade: Quantos vértices, além do primeiro, são fixados em cada parte da busca dividida entre processos
+        :return: Uma lista alternando vértices e arestas, começando e terminando no mesmo vértice; False se o grafo não
+        tiver ciclo hamiltoniano; ou None se o tempo limite acabar antes de a busca terminar
+        '''
+        n = len(self.N)
+        if n == 0:
+            return False
 
+        # Com um ou dois vértices, o ciclo depende de laço ou de arestas paralelas
+        if n == 1:
+            if self.__armazenamento.multiplicidade(0, 0) > 0:
+                return [self.N[0], self.N[0] + Grafo.SEPARADOR_ARESTA + self.N[0], self.N[0]]
+            return False
+        if n == 2:
+            if self.__armazenamento.multiplicidade(0, 1) > 1:
+                aresta = self.N[0] + Grafo.SEPARADOR_ARESTA + self.N[1]
+                return [self.N[0], aresta, self.N[1], aresta, self.N[0]]
+            return False
 
-    def ciclo_hamiltoniano_recursiva(self,v,lista=[]):
-        lista_v=[]
-        lista.append(v)
-        lista_v=self.arestas_sobre_vertice(v)
+        # A partir de três vértices, laços e arestas paralelas não fazem diferença: basta saber quem é adjacente a quem
+        adjacencia = [self.__armazenamento.linha_bits(i) & ~(1 << i) for i in range(n)]
+        for bits in adjacencia:
+            if bin(bits).count('1') < 2:
+                return False
+        if len(self.alcancaveis(self.N[0])) != n:
+            return False
 
+        if n <= self.MAX_VERTICES_HELD_KARP:
+            ciclo = Grafo.__ciclo_held_karp(adjacencia)
+        else:
+            prazo = None if tempo_limite == None else time.monotonic() + tempo_limite
+            if processos != None and processos > 1:
+                ciclo = Grafo.__busca_ciclo_paralela(adjacencia, prazo, processos, profundidade)
+            else:
+                ciclo = _busca_ciclo_hamiltoniano(adjacencia, [0], prazo)
+
+        if not ciclo:
+            return ciclo
+
+        ciclo.append(ciclo[0])
+        resposta = [self.N[ciclo[0]]]
+        for k in range(1, len(ciclo)):
+            i, j = ciclo[k - 1], ciclo[k]
+            if i > j:
+                i, j = j, i
+            resposta.append(self.N[i] + Grafo.SEPARADOR_ARESTA + self.N[j])
+            resposta.append(self.N[ciclo[k]])
+        return resposta
+
+    @staticmethod
+    def __busca_ciclo_paralela(adjacencia, prazo, processos, profundidade):
+        '''
+        Divide a árvore da busca com retrocesso no nível profundidade: cada caminho viável que começa no vértice 0 e tem
+        profundidade vértices além dele vira uma tarefa de um ProcessPoolExecutor. Assim que uma tarefa encontra um ciclo,
+        as demais são avisadas por um evento compartilhado e as que ainda não começaram são canceladas.
+        :return: Como em _busca_ciclo_hamiltoniano
+        '''
+        n = len(adjacencia)
+        prefixos = [[0]]
+        for _ in range(min(profundidade, n - 1)):
+            proximos = []
+            for prefixo in prefixos:
+                visitados = 0
+                for v in prefixo:
+                    visitados |= 1 << v
+                livres = adjacencia[prefixo[-1]] & ~visitados
+                while livres:
+                    menor = livres & -livres
+                    livres ^= menor
+                    w = menor.bit_length() - 1
+                    if _caminho_viavel(adjacencia, visitados | menor, w, 0):
+                        if len(prefixo) + 1 == n:
+                            return prefixo + [w]
+                        proximos.append(prefixo + [w])
+            prefixos = proximos
+            if not prefixos:
+                return False
 
+        resposta = False
+        with multiprocessing.Manager() as gerente:
+            parar = gerente.Event()
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                pendentes = {executor.submit(_busca_ciclo_hamiltoniano, adjacencia, prefixo, prazo, parar) for prefixo in prefixos}
+                while pendentes:
+                    prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    for tarefa in prontos:
+                        ciclo = tarefa.result()
+                        if ciclo or ciclo == None:
+                            # Um ciclo encontrado, ou o prazo, que é o mesmo para todas as partes, acabou
+                            resposta = ciclo
+                            break
+                    if resposta != False:
+                        parar.set()
+                        for tarefa in pendentes:
+                            tarefa.cancel()
+                        break
+        return resposta
+
+    @staticmethod
+    def __ciclo_held_karp(adjacencia):
+        '''
+        Programação dinâmica de Held-Karp com o vértice 0 fixo como início. Os demais vértices 1..n-1 viram os bits 0..n-2, e
+        finais[S] é o conjunto de bits dos vértices em que pode terminar um caminho que sai de 0 e visita exatamente o
+        conjunto S. Tempo O(2^n n) e memória O(2^n), guardada num array de inteiros.
+        :return: A lista dos índices dos vértices do ciclo, começando em 0, ou False se não houver ciclo
+        '''
+        m = len(adjacencia) - 1
+        # Vizinhança de cada vértice 1..n-1 restrita aos vértices 1..n-1, já no sistema de bits deslocado
+        vizinhos = [adjacencia[k + 1] >> 1 for k in range(m)]
+        ligados_ao_inicio = adjacencia[0] >> 1
+
+        finais = array('Q', [0]) * (1 << m)
+        for k in range(m):
+            if ligados_ao_inicio >> k & 1:
+                finais[1 << k] = 1 << k
+
+        for S in range(1, 1 << m):
+            if S & (S - 1) == 0:
+                continue # Conjuntos de um só vértice já foram preenchidos
+            resto = S
+            bits = 0
+            while resto:
+                menor = resto & -resto
+                resto ^= menor
+                w = menor.bit_length() - 1
+                if finais[S ^ menor] & vizinhos[w]:
+                    bits |= menor
+            finais[S] = bits
+
+        S = (1 << m) - 1
+        candidatos = finais[S] & ligados_ao_inicio
+        if not candidatos:
+            return False
 
-        for i in lista_v:
-            if i not in lista:
-                v1,v2=i.split(self.SEPARADOR_ARESTA)
-                if v1!=v and v1 not in lista:
-                    lista.append(i)
-                    self.ciclo_hamiltoniano_recursiva(v1,lista)
-                elif v2!= v and v2 not in lista:
-                    lista.append(i)
-                    self.ciclo_hamiltoniano_recursiva(v2,lista)
+        # Reconstrói o caminho de trás para frente
+        w = (candidatos & -candidatos).bit_length() - 1
+        caminho = [w]
+        while S & (S - 1):
+            S ^= 1 << w
+            anteriores = finais[S] & vizinhos[w]
+            w = (anteriores & -anteriores).bit_length() - 1
+            caminho.append(w)
+        caminho.reverse()
+        return [0] + [k + 1 for k in caminho]
 
-                else:
-                    break
 
     def eh_conexo(self):
-        vertices = self.N
-        conexos = set()
-
-        self.eh_conexo_aux(vertices[0], conexos)
+        if len(self.N) == 0:
+            return True
+        visitado = bytearray(len(self.N))
+        return len(self.__componente(0, visitado)) == len(self.N)
 
-        for i in vertices:
-            if i not in conexos:
-                return False
-        return True
-
-    def eh_conexo_aux(self, vertice='', conexos=set()):
-        matriz = self.M
-        vertices = self.N
-
-        for i in range(len(matriz)):
-            for j in range(len(matriz[i])):
-                if i - j < 0 and matriz[i][j] > 0:
-                    if i == vertices.index(vertice) and vertices[j] not in conexos:
-                        conexos.add(vertices[j])
-                        self.eh_conexo_aux(vertices[j], conexos)
-
-                    if j == vertices.index(vertice) and vertices[i] not in conexos:
-                        conexos.add(vertices[i])
-                        self.eh_conexo_aux(vertices[i], conexos)
+    def eh_conexo_aux(self, vertice='', conexos=None):
+        '''
+        Acrescenta ao conjunto conexos todos os vértices alcançáveis a partir de vertice (incluindo ele mesmo).
+        :param vertice: O vértice de partida
+        :param conexos: O conjunto que recebe os vértices alcançados. Se não for passado, um novo conjunto é criado
+        :return: O conjunto conexos
+        :raises VerticeInvalidoException se o vértice não existir no grafo.
+        '''
+        inicio = self.indice_vertice(vertice)
+        if conexos == None:
+            conexos = set()
+        visitado = bytearray(len(self.N))
+        for j in self.__componente(inicio, visitado):
+            conexos.add(self.N[j])
+        return conexos
+
+    def componentes_conexos(self):
+        '''
+        Separa os vértices do grafo em componentes conexas, numa única passada O(V+E) sobre as listas de vizinhos.
+        :return: Uma lista de componentes, na ordem do primeiro vértice de cada uma; cada componente é uma lista de vértices na ordem em que foram visitados
+        '''
+        visitado = bytearray(len(self.N))
+        componentes = []
+        for i in range(len(self.N)):
+            if not visitado[i]:
+                componentes.append([self.N[j] for j in self.__componente(i, visitado)])
+        return componentes
+
+    def __componente(self, inicio: int, visitado: bytearray):
+        '''
+        Busca em profundidade com pilha explícita (sem recursão, para não estourar o limite de recursão em grafos grandes)
+        a partir do vértice de índice inicio, marcando em visitado os vértices alcançados.
+        :return: Os índices dos vértices alcançados, na ordem em que foram visitados
+        '''
+        visitado[inicio] = 1
+        pilha = [inicio]
+        alcancados = []
+        while pilha:
+            i = pilha.pop()
+            alcancados.append(i)
+            for j, q in self.__armazenamento.vizinhos(i):
+                if not visitado[j]:
+                    visitado[j] = 1
+                    pilha.append(j)
+        return alcancados
 
     def quantidade_de_arestas(self):
-        quantidade_de_arestas1 = 0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if (self.M[i][j] == 1):
-                    quantidade_de_arestas1 += 1
-
-        return quantidade_de_arestas1
+        return self.__armazenamento.quantidade_de_pares(1)
 
     def caminho_eureliano(self):
-        conexo = self.eh_conexo()
-        if conexo == True:
-            vertices_impares = 0
-            guarda_vertice_impar = []
-            caminho_eureliano = []
-            vertice_aleatorio = []
-            for i in range(len(self.M)):
-                for j in range(len(self.M[i])):
-                    if self.M[i][j] != self.SEPARADOR_ARESTA:
-                        vertice_aleatorio.append(self.N[i])
-                        vertice = self.N[i]
-                        lista_aresta_sobre_vertice = self.arestas_sobre_vertice(vertice)
-                        if len(lista_aresta_sobre_vertice) == 1:
-                            vertices_impares += 1
-                            guarda_vertice_impar.append(vertice)
-            if vertices_impares == 0:
-                resposta = self.caminho_eureliano_sem_vertice_impar(caminho_eureliano, vertice_aleatorio[0])
-                return resposta
-            if vertices_impares == (len(self.N) + 1):
-                vertice1 = guarda_vertice_impar[0]
-                vertice2 = guarda_vertice_impar[1]
-                resposta = self.caminho_eureliano_rec_com_vertice_impar(caminho_eureliano, vertice1, vertice2)
-                return resposta
-        return False
-
-    def caminho_eureliano_sem_vertice_impar(self, lista, vertice):
-        lista.append(vertice)
-        lista_arestas = self.arestas_sobre_vertice(vertice)
-        for a in lista_arestas:
-            if a not in lista:
-                v1 = a[0]
-                v2 = a[2]
-                if (v1 not in lista):
-                    if a not in lista:
-                        lista.append(a)
-                        self.caminho_eureliano_sem_vertice_impar(lista, v1)
-                if (v2 not in lista):
-                    if a not in lista:
-                        lista.append(a)
-                        self.caminho_eureliano_sem_vertice_impar(lista, v2)
-
-        if len(lista) == 0:
+        '''
+        Encontra um caminho (ou ciclo) euleriano pelo algoritmo de Hierholzer, sem recursão. As arestas de cada vértice ficam
+        numa lista de adjacência consumível: cada aresta, inclusive as paralelas e os laços, tem um identificador e é marcada
+        como usada ao ser percorrida, e cada vértice guarda até onde a sua lista já foi consumida. Complexidade O(V+E).
+        :return: Uma lista alternando vértices e arestas, começando e terminando num vértice, ou False se o grafo não tiver caminho euleriano
+        '''
+        n = len(self.N)
+        adjacencia = [[] for _ in range(n)] # Para cada vértice, as tuplas (vizinho, identificador da aresta)
+        arestas = [] # O nome de cada aresta, pelo identificador
+        impares = []
+        for i in range(n):
+            paridade = 0
+            for j, q in self.__armazenamento.vizinhos(i):
+                if j == i:
+                    # Um laço soma 2 ao grau e aparece uma única vez na lista do vértice
+                    for _ in range(q):
+                        adjacencia[i].append((i, len(arestas)))
+                        arestas.append(self.N[i] + Grafo.SEPARADOR_ARESTA + self.N[i])
+                else:
+                    paridade += q
+                    if i < j:
+                        for _ in range(q):
+                            adjacencia[i].append((j, len(arestas)))
+                            adjacencia[j].append((i, len(arestas)))
+                            arestas.append(self.N[i] + Grafo.SEPARADOR_ARESTA + self.N[j])
+            if paridade % 2:
+                impares.append(i)
+
+        if not arestas or len(impares) not in (0, 2):
             return False
+
+        if impares:
+            inicio = impares[0]
         else:
-            vertice_inicial = self.N[0]
-            lista_arestas_vertice_inicial = self.arestas_sobre_vertice(vertice_inicial)
-            for i in range(len(self.M)):
-                for j in range(len(self.M[i])):
-                    vertice_inicial = self.N[i]
-
-            for i in lista_arestas_vertice_inicial:
-                aresta_final = i
-
-            lista.append(aresta_final)
-            return lista
-
-    def caminho_eureliano_rec_com_vertice_impar(self, lista, vertice1, vertice2):
-        lista.append(vertice1)
-        lista_arestas = self.arestas_sobre_vertice(vertice1)
-        for a in lista_arestas:
-            if a not in lista:
-                v1 = a[0]
-                v2 = a[2]
-                if (v1 not in lista) and (v2 not in lista):
-                    if v1 != vertice1 and (v1 not in lista):
-                        if v1 != vertice2:
-                            lista.append(a)
-                            self.caminho_eureliano_rec_com_vertice_impar(lista, v1, vertice2)
-                        elif v1 == vertice2 and len(self.N) == (a + 1):
-                            lista.append(vertice2)
-                    elif v2 != vertice1 and (v2 not in lista):
-                        if v2 != vertice2:
-                            lista.append(a)
-                            self.caminho_eureliano_rec_com_vertice_impar(lista, v2, vertice2)
-                        elif v2 == vertice2 and len(self.N) == (a + 1):
-                            lista.append(vertice2)
-
-        if len(lista) < 3:
+            inicio = next(i for i in range(n) if adjacencia[i])
+
+        usada = bytearray(len(arestas))
+        posicao = [0] * n
+        pilha = [(inicio, -1)] # (vértice, aresta pela qual se chegou a ele)
+        percurso = []
+        while pilha:
+            v, _ = pilha[-1]
+            lista = adjacencia[v]
+            p = posicao[v]
+            while p < len(lista) and usada[lista[p][1]]:
+                p += 1
+            if p == len(lista):
+                percurso.append(pilha.pop())
+            else:
+                w, e = lista[p]
+                usada[e] = 1
+                pilha.append((w, e))
+                p += 1
+            posicao[v] = p
+
+        # Se sobrou aresta sem usar, as arestas não estão todas na mesma componente conexa
+        if len(percurso) != len(arestas) + 1:
             return False
 
-        return lista
+        percurso.reverse()
+        caminho = [self.N[inicio]]
+        for v, e in percurso[1:]:
+            caminho.append(arestas[e])
+            caminho.append(self.N[v])
+        return caminho
+
 
 
 
@@ -468,10 +1049,15 @@ class Grafo:
 
         grafo_str += '\n'
 
-        for l in range(len(self.M)):
+        # Monta uma linha da matriz por vez, direto do armazenamento, em vez de montar a matriz inteira
+        for l in range(len(self.N)):
+            linha = ['-'] * l + [0] * (len(self.N) - l)
+            for c, q in self.__armazenamento.vizinhos(l):
+                if c >= l:
+                    linha[c] = q
             grafo_str += self.N[l] + ' '
-            for c in range(len(self.M)):
-                grafo_str += str(self.M[l][c]) + ' '
+            for c in range(len(linha)):
+                grafo_str += str(linha[c]) + ' '
             grafo_str += '\n'
 
         return grafo_str
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
-
-import copy
+from collections import OrderedDict
 
 class VerticeInvalidoException(Exception):
     pass
@@ -15,6 +14,7 @@ class Grafo:
 
     QTDE_MAX_SEPARADOR = 1
     SEPARADOR_ARESTA = '-'
+    MAX_ALCANCES_EM_CACHE = 256 # Quantos conjuntos de vértices alcançáveis alcancavel guarda, descartando os usados há mais tempo
     __maior_vertice = 0
 
     def __init__(self, V=None, M=None):
@@ -37,6 +37,7 @@ class Grafo:
                 self.__maior_vertice = len(v)
 
         self.N = list(V)
+        self.__indices = {v: i for i, v in enumerate(self.N)}
 
         if M == []:
             for k in range(len(V)):
@@ -55,19 +56,22 @@ class Grafo:
             if len(c) != len(V):
                 raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
 
-        for i in range(len(V)):
-            for j in range(len(V)):
-                '''
-                Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
-                Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
-                '''
-
-
-                aresta = V[i] + Grafo.SEPARADOR_ARESTA + V[j]
-                if not(self.arestaValida(aresta)):
-                    raise ArestaInvalidaException('A aresta ' + aresta + ' é inválida')
-
-        self.M = list(M)
+        # Como os vértices já foram validados, qualquer par deles forma uma aresta válida; só o tamanho da matriz precisava ser verificado
+        self.__matriz = [list(linha) for linha in M] # Cópia das linhas, para que alterar a matriz recebida não altere o grafo
+        self.__linhas = self.__linhas_bits() # As linhas da matriz como conjuntos de bits, mantidas junto com a matriz
+        self.__alcances = OrderedDict() # Vértices alcançáveis a partir de cada origem já consultada, do uso mais antigo ao mais recente
+        # Fecho transitivo mantido incrementalmente depois da primeira chamada de fecho_transitivo: as linhas (quem cada vértice
+        # alcança) e as colunas (quem alcança cada vértice) como conjuntos de bits. Fica None enquanto não for pedido
+        self.__fecho = None
+        self.__fecho_colunas = None
+
+    @property
+    def M(self):
+        '''
+        A matriz de adjacência do grafo, no mesmo formato da que é passada ao construtor. É uma cópia nova a cada acesso,
+        então alterá-la não altera o grafo: para incluir ou retirar arestas, use adicionaAresta e remove_aresta.
+        '''
+        return [list(linha) for linha in self.__matriz]
 
     def arestaValida(self, aresta=''):
         '''
@@ -113,39 +117,28 @@ class Grafo:
         :param vertice: O vértice que deve ser verificado.
         :return: Um valor booleano que indica se o vértice existe no grafo.
         '''
-        return Grafo.verticeValido(vertice) and self.N.count(vertice) > 0
-
-    def __primeiro_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o vértice X
-        :param a: a aresta a ser analisada
-        :return: O primeiro vértice da aresta
-        '''
-        return a[0:a.index(Grafo.SEPARADOR_ARESTA)]
-
-    def __segundo_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o vértice Y
-        :param a: A aresta a ser analisada
-        :return: O segundo vértice da aresta
-        '''
-        return a[a.index(Grafo.SEPARADOR_ARESTA)+1:]
+        return Grafo.verticeValido(vertice) and vertice in self.__indices
 
-    def __indice_primeiro_vertice_aresta(self, a: str):
+    def indice_vertice(self, v: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice X na lista de vértices
-        :param a: A aresta a ser analisada
-        :return: O índice do primeiro vértice da aresta na lista de vértices
+        Retorna o identificador inteiro de um vértice, que é a sua posição na lista de vértices e na matriz.
+        :param v: O vértice cujo identificador se deseja
+        :return: O índice do vértice na lista de vértices
+        :raises VerticeInvalidoException se o vértice não existir no grafo.
         '''
-        return self.N.index(self.__primeiro_vertice_aresta(a))
+        if v not in self.__indices:
+            raise VerticeInvalidoException('O vértice {} não existe'.format(v))
+        return self.__indices[v]
 
-    def __indice_segundo_vertice_aresta(self, a: str):
+    def __indices_aresta(self, a: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice Y na lista de vértices
+        Dada uma aresta no formato X-Y, retorna os índices dos vértices X e Y na lista de vértices,
+        separando o string uma única vez
         :param a: A aresta a ser analisada
-        :return: O índice do segundo vértice da aresta na lista de vértices
+        :return: Uma tupla com os índices do primeiro e do segundo vértice da aresta
         '''
-        return self.N.index(self.__segundo_vertice_aresta(a))
+        v1, _, v2 = a.partition(Grafo.SEPARADOR_ARESTA)
+        return self.__indices[v1], self.__indices[v2]
 
     def existeAresta(self, a: str):
         '''
@@ -153,14 +146,19 @@ class Grafo:
         :param aresta: A aresta a ser verificada
         :return: Um valor booleano que indica se a aresta existe no grafo.
         '''
-        existe = False
-        if Grafo.arestaValida(self, a):
-            for i in range(len(self.M)):
-                for j in range(len(self.M)):
-                    if self.M[self.__indice_primeiro_vertice_aresta(a)][self.__indice_segundo_vertice_aresta(a)]:
-                        existe = True
+        if not Grafo.arestaValida(self, a):
+            return False
+        i_a1, i_a2 = self.__indices_aresta(a)
+        return self.__matriz[i_a1][i_a2] > 0
 
-        return existe
+    def existem_arestas(self, arestas):
+        '''
+        Verifica de uma só vez se cada aresta de uma coleção pertence ao grafo.
+        :param arestas: Um iterável de arestas no formato X-Y
+        :return: Uma lista de valores booleanos, na mesma ordem das arestas recebidas
+        '''
+        existe = self.existeAresta
+        return [existe(a) for a in arestas]
 
     def adicionaVertice(self, v):
         '''
@@ -168,7 +166,7 @@ class Grafo:
         :param v: O vértice a ser incluído no grafo.
         :raises VerticeInvalidoException se o vértice já existe ou se ele não estiver no formato válido.
         '''
-        if v in self.N:
+        if v in self.__indices:
             raise VerticeInvalidoException('O vértice {} já existe'.format(v))
 
         if self.verticeValido(v):
@@ -176,14 +174,20 @@ class Grafo:
                 self.__maior_vertice = len(v)
 
             self.N.append(v) # Adiciona vértice na lista de vértices
-            self.M.append([]) # Adiciona a linha
+            self.__matriz.append([]) # Adiciona a linha
+            i_v = len(self.N) - 1
+            self.__indices[v] = i_v
+            self.__linhas.append(0)
+            if self.__fecho != None:
+                self.__fecho.append(0)
+                self.__fecho_colunas.append(0)
 
             for k in range(len(self.N)):
-                if k != len(self.N) -1:
-                    self.M[k].append(0) # adiciona os elementos da coluna do vértice
-                    self.M[self.N.index(v)].append('-') # adiciona os elementos da linha do vértice
+                if k != i_v:
+                    self.__matriz[k].append(0) # adiciona os elementos da coluna do vértice
+                    self.__matriz[i_v].append(0) # adiciona os elementos da linha do vértice
                 else:
-                    self.M[self.N.index(v)].append(0)  # adiciona um zero no último elemento da linha
+                    self.__matriz[i_v].append(0)  # adiciona um zero no último elemento da linha
         else:
             raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
@@ -194,13 +198,29 @@ class Grafo:
         :raise: lança uma exceção caso a aresta não estiver em um formato válido
         '''
         if self.arestaValida(a):
-            i_a1 = self.__indice_primeiro_vertice_aresta(a)
-            i_a2 = self.__indice_segundo_vertice_aresta(a)
-            self.M[i_a1][i_a2] += 1
-
+            self.__adiciona_aresta_indices(*self.__indices_aresta(a))
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
+    def adiciona_aresta_ids(self, i: int, j: int):
+        '''
+        Adiciona uma aresta ao grafo a partir dos identificadores inteiros dos seus vértices (ver indice_vertice),
+        sem precisar montar nem interpretar o string X-Y
+        :param i: O índice do vértice de origem da aresta
+        :param j: O índice do vértice de destino da aresta
+        :raise: lança uma exceção caso algum dos índices não corresponda a um vértice do grafo
+        '''
+        if not (0 <= i < len(self.N) and 0 <= j < len(self.N)):
+            raise ArestaInvalidaException('A aresta ({}, {}) é inválida'.format(i, j))
+        self.__adiciona_aresta_indices(i, j)
+
+    def __adiciona_aresta_indices(self, i_a1: int, i_a2: int):
+        self.__matriz[i_a1][i_a2] += 1
+        self.__linhas[i_a1] |= 1 << i_a2
+        self.__invalida_alcances(i_a1)
+        if self.__fecho != None:
+            self.__inclui_no_fecho(i_a1, i_a2)
+
     def remove_aresta(self, a):
         '''
         Remove uma aresta ao grafo no formato X-Y, onde X é o primeiro vértice e Y é o segundo vértice
@@ -209,12 +229,13 @@ class Grafo:
         '''
         if self.arestaValida(a):
             if self.existeAresta(a):
-                i_a1 = self.__indice_primeiro_vertice_aresta(a)
-                i_a2 = self.__indice_segundo_vertice_aresta(a)
-                if i_a1 < i_a2:
-                    self.M[i_a1][i_a2] -= 1
-                else:
-                    self.M[i_a2][i_a1] -= 1
+                i_a1, i_a2 = self.__indices_aresta(a)
+                self.__matriz[i_a1][i_a2] -= 1
+                if self.__matriz[i_a1][i_a2] == 0: # Se ainda houver aresta paralela, nada muda no alcance
+                    self.__linhas[i_a1] &= ~(1 << i_a2)
+                    self.__invalida_alcances(i_a1)
+                    if self.__fecho != None:
+                        self.__retira_do_fecho(i_a1)
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
@@ -237,10 +258,10 @@ class Grafo:
 
         grafo_str += '\n'
 
-        for l in range(len(self.M)):
+        for l in range(len(self.__matriz)):
             grafo_str += self.N[l] + ' '
-            for c in range(len(self.M)):
-                grafo_str += str(self.M[l][c]) + ' '
+            for c in range(len(self.__matriz)):
+                grafo_str += str(self.__matriz[l][c]) + ' '
             grafo_str += '\n'
 
         return grafo_str
@@ -251,47 +272,290 @@ class Grafo:
 
 
 
-    def warshall(self):
-        E  = copy.deepcopy(self)
-        tam=len(self.N)
-
-        for i in range(tam):
-            for j in range(tam):
-                if E.M[j][i] == 1:
-                    for k in range(tam):
-                        E.M[j][k]=max(E.M[j][k],E.M[i][k])
-
-        return E
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def __linhas_bits(self):
+        '''
+        Representa cada linha da matriz como um conjunto de bits: o bit j da linha i vale 1 se há aresta de i para j
+        '''
+        linhas = []
+        for linha in self.__matriz:
+            bits = 0
+            for j, q in enumerate(linha):
+                if q > 0:
+                    bits |= 1 << j
+            linhas.append(bits)
+        return linhas
+
+    @staticmethod
+    def __indices_dos_bits(bits: int):
+        '''
+        Percorre, do menor para o maior, os índices dos bits que valem 1 num conjunto de bits
+        '''
+        while bits:
+            menor = bits & -bits
+            yield menor.bit_length() - 1
+            bits ^= menor
 
+    def __grafo_de_linhas(self, linhas):
+        '''
+        Monta um novo grafo com os mesmos vértices cuja matriz tem 1 onde o bit correspondente das linhas vale 1 e 0 nas demais células
+        '''
+        n = len(self.N)
+        # A representação binária do inteiro, invertida, já é a linha da matriz (o bit 0 é a coluna 0)
+        formato = '0{}b'.format(n)
+        M = []
+        for bits in linhas:
+            binario = format(bits, formato)
+            if binario.count('1') * 8 < n:
+                # Linha esparsa: é mais rápido marcar só os bits que valem 1
+                linha = [0] * n
+                for j in Grafo.__indices_dos_bits(bits):
+                    linha[j] = 1
+            else:
+                linha = list(map(int, reversed(binario)))
+            M.append(linha)
+        return Grafo(list(self.N), M)
 
+    def warshall(self):
+        '''
+        Calcula o fecho transitivo do grafo pelo algoritmo de Warshall. Cada linha da matriz é um inteiro usado como
+        conjunto de bits, então a linha k inteira é acrescentada às linhas que alcançam k com uma única operação OR.
+        O grafo original não é alterado nem copiado.
+        :return: Um novo grafo, com os mesmos vértices, cuja matriz tem 1 na célula (i, j) se existe caminho de i para j e 0 caso contrário
+        '''
+        linhas = list(self.__linhas)
+        tam = len(linhas)
 
+        for k in range(tam):
+            bit_k = 1 << k
+            linha_k = linhas[k]
+            if linha_k:
+                for i in range(tam):
+                    if linhas[i] & bit_k:
+                        linhas[i] |= linha_k
 
+        return self.__grafo_de_linhas(linhas)
 
 
+    def __listas_adjacencia(self):
+        '''
+        Retorna, para cada índice de vértice, a lista dos índices dos vértices para os quais ele tem aresta
+        '''
+        return [list(Grafo.__indices_dos_bits(bits)) for bits in self.__linhas]
 
+    @staticmethod
+    def __componentes_fortes(adjacencia):
+        '''
+        Algoritmo de Tarjan, sem recursão: a pilha de chamadas guarda, para cada vértice em visita, a posição do próximo vizinho a explorar.
+        :param adjacencia: As listas de adjacência do grafo, por índice de vértice
+        :return: Uma tupla (componente de cada vértice, lista das componentes). As componentes saem em ordem topológica
+        inversa do grafo condensado: cada componente só tem arestas para componentes que aparecem antes dela na lista
+        '''
+        n = len(adjacencia)
+        indice = [-1] * n
+        menor = [0] * n
+        na_pilha = bytearray(n)
+        pilha = []
+        componente = [-1] * n
+        componentes = []
+        contador = 0
+
+        for raiz in range(n):
+            if indice[raiz] != -1:
+                continue
+            indice[raiz] = menor[raiz] = contador
+            contador += 1
+            pilha.append(raiz)
+            na_pilha[raiz] = 1
+            chamadas = [(raiz, 0)]
+            while chamadas:
+                v, posicao = chamadas[-1]
+                if posicao < len(adjacencia[v]):
+                    chamadas[-1] = (v, posicao + 1)
+                    w = adjacencia[v][posicao]
+                    if indice[w] == -1:
+                        indice[w] = menor[w] = contador
+                        contador += 1
+                        pilha.append(w)
+                        na_pilha[w] = 1
+                        chamadas.append((w, 0))
+                    elif na_pilha[w] and indice[w] < menor[v]:
+                        menor[v] = indice[w]
+                else:
+                    chamadas.pop()
+                    if chamadas:
+                        u = chamadas[-1][0]
+                        if menor[v] < menor[u]:
+                            menor[u] = menor[v]
+                    if menor[v] == indice[v]:
+                        # v é a raiz de uma componente: todos os vértices acima dele na pilha pertencem a ela
+                        membros = []
+                        while True:
+                            w = pilha.pop()
+                            na_pilha[w] = 0
+                            componente[w] = len(componentes)
+                            membros.append(w)
+                            if w == v:
+                                break
+                        componentes.append(membros)
+
+        return componente, componentes
+
+    def fecho_transitivo_esparso(self):
+        '''
+        Calcula o mesmo fecho transitivo de warshall, mas pensado para grafos esparsos: as componentes fortemente conexas
+        são encontradas pelo algoritmo de Tarjan e o alcance de cada componente é propagado pelo grafo condensado (um DAG),
+        como um conjunto de bits, em ordem topológica inversa. Cada aresta é vista uma única vez, então o custo depende de
+        E e do número de componentes, e não de V³.
+        :return: Um novo grafo, com os mesmos vértices, cuja matriz tem 1 na célula (i, j) se existe caminho de i para j e 0 caso contrário
+        '''
+        return self.__grafo_de_linhas(self.__fecho_linhas_esparso())
 
+    def __fecho_linhas_esparso(self):
+        '''
+        Calcula o fecho transitivo como em fecho_transitivo_esparso, retornando as linhas como conjuntos de bits
+        '''
+        adjacencia = self.__listas_adjacencia()
+        componente, componentes = Grafo.__componentes_fortes(adjacencia)
+
+        alcance = []
+        for c, membros in enumerate(componentes):
+            bits_membros = 0
+            for v in membros:
+                bits_membros |= 1 << v
+
+            # Os vértices de uma componente com mais de um vértice alcançam uns aos outros; um vértice sozinho só alcança a si mesmo se tiver laço
+            if len(membros) > 1 or self.__matriz[membros[0]][membros[0]] > 0:
+                bits = bits_membros
+            else:
+                bits = 0
+
+            # As componentes vizinhas já foram processadas, pois saíram antes desta no algoritmo de Tarjan
+            for v in membros:
+                for w in adjacencia[v]:
+                    d = componente[w]
+                    if d != c:
+                        bits |= alcance[d]
+                        bits |= 1 << w
+            alcance.append(bits)
+
+        return [alcance[componente[v]] for v in range(len(self.N))]
+
+    def fecho_transitivo(self):
+        '''
+        Retorna o fecho transitivo do grafo, no mesmo formato de warshall. Na primeira chamada o fecho é calculado como em
+        fecho_transitivo_esparso; a partir daí ele é mantido a cada inclusão ou remoção de aresta, alterando só as linhas
+        dos vértices afetados, e alcancavel passa a consultá-lo diretamente.
+        :return: Um novo grafo, com os mesmos vértices, cuja matriz tem 1 na célula (i, j) se existe caminho de i para j e 0 caso contrário
+        '''
+        if self.__fecho == None:
+            self.__fecho = self.__fecho_linhas_esparso()
+            colunas = [0] * len(self.N)
+            for i, bits in enumerate(self.__fecho):
+                bit_i = 1 << i
+                for j in Grafo.__indices_dos_bits(bits):
+                    colunas[j] |= bit_i
+            self.__fecho_colunas = colunas
+        return self.__grafo_de_linhas(self.__fecho)
+
+    def __inclui_no_fecho(self, i: int, j: int):
+        '''
+        Atualiza o fecho mantido depois da inclusão da aresta i->j: quem alcança i (e o próprio i) passa a alcançar j
+        e tudo o que j alcança. Só as linhas desses vértices e as colunas dos vértices recém-alcançados mudam
+        '''
+        fecho = self.__fecho
+        if fecho[i] >> j & 1:
+            return # i já alcançava j, então quem alcança i já alcançava tudo o que j alcança
 
+        novos = (1 << j) | fecho[j]
+        origens = self.__fecho_colunas[i] | (1 << i)
+        for k in Grafo.__indices_dos_bits(origens):
+            fecho[k] |= novos
 
+        colunas = self.__fecho_colunas
+        for w in Grafo.__indices_dos_bits(novos):
+            colunas[w] |= origens
 
+    def __retira_do_fecho(self, i: int):
+        '''
+        Atualiza o fecho mantido depois da remoção da última aresta que saía de i para algum vértice. Só quem alcança i
+        (e o próprio i) pode perder alcance; as linhas desses vértices são recalculadas por busca em largura restrita a eles,
+        aproveitando as linhas dos demais vértices, que não mudam (um vértice que não alcança i não alcança ninguém que alcance i)
+        '''
+        fecho = self.__fecho
+        colunas = self.__fecho_colunas
+        linhas = self.__linhas
+        afetados = colunas[i] | (1 << i)
+
+        novos = {}
+        for k in Grafo.__indices_dos_bits(afetados):
+            alcance = 0
+            fronteira = linhas[k]
+            while fronteira:
+                alcance |= fronteira
+                proxima = 0
+                for w in Grafo.__indices_dos_bits(fronteira):
+                    if afetados >> w & 1:
+                        proxima |= linhas[w]
+                    else:
+                        alcance |= fecho[w]
+                fronteira = proxima & ~alcance
+            novos[k] = alcance
+
+        for k, alcance in novos.items():
+            perdidos = fecho[k] & ~alcance
+            fecho[k] = alcance
+            bit_k = 1 << k
+            for w in Grafo.__indices_dos_bits(perdidos):
+                colunas[w] &= ~bit_k
+
+    def alcancavel(self, u, v):
+        '''
+        Verifica se existe caminho (com pelo menos uma aresta) de u para v, como na matriz de warshall, sem calcular o fecho inteiro.
+        O conjunto de vértices alcançáveis a partir de u é calculado por uma busca em largura sobre as linhas de bits e fica
+        guardado para as próximas consultas com a mesma origem. O cache guarda até MAX_ALCANCES_EM_CACHE origens e é
+        atualizado automaticamente quando arestas são adicionadas ou removidas. Se o fecho já estiver sendo mantido por
+        fecho_transitivo, a consulta é feita direto nele.
+        :param u: O vértice de origem
+        :param v: O vértice de destino
+        :return: Um valor booleano que indica se v é alcançável a partir de u
+        :raises VerticeInvalidoException se algum dos vértices não existir no grafo.
+        '''
+        i_u = self.indice_vertice(u)
+        i_v = self.indice_vertice(v)
+        if self.__fecho != None:
+            return bool(self.__fecho[i_u] >> i_v & 1)
+        return bool(self.__alcance(i_u) >> i_v & 1)
 
+    def __alcance(self, i: int):
+        '''
+        Retorna o conjunto de bits dos vértices alcançáveis a partir do vértice de índice i, consultando o cache antes de fazer a busca
+        '''
+        alcances = self.__alcances
+        if i in alcances:
+            alcances.move_to_end(i)
+            return alcances[i]
+
+        linhas = self.__linhas
+        alcance = 0
+        fronteira = linhas[i]
+        while fronteira:
+            alcance |= fronteira
+            proxima = 0
+            for j in Grafo.__indices_dos_bits(fronteira):
+                proxima |= linhas[j]
+            fronteira = proxima & ~alcance
+
+        alcances[i] = alcance
+        if len(alcances) > self.MAX_ALCANCES_EM_CACHE:
+            alcances.popitem(last=False)
+        return alcance
+
+    def __invalida_alcances(self, i: int):
+        '''
+        Descarta do cache as origens cujo alcance pode ter mudado com a inclusão ou remoção de uma aresta que sai de i:
+        a própria origem i e as que alcançam i. As demais não passam por i e continuam válidas
+        '''
+        bit_i = 1 << i
+        alcances = self.__alcances
+        for origem in [o for o, alcance in alcances.items() if o == i or alcance & bit_i]:
+            del alcances[origem]
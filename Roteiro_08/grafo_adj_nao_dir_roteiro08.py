@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import math
-from copy import deepcopy
+from array import array
+from heapq import heappush, heappop
 
 class VerticeInvalidoException(Exception):
     pass
@@ -16,6 +17,47 @@ class ArestaNaoExistenteException(object):
     pass
 
 
+class ConjuntosDisjuntos:
+    '''
+    Floresta de conjuntos disjuntos (union-find) sobre os inteiros 0..n-1, guardada em arrays.
+    Usa compressão de caminho na busca e união por posto, então cada operação custa tempo quase constante.
+    '''
+
+    def __init__(self, n: int):
+        self.__pai = array('l', range(n))
+        self.__posto = bytearray(n) # O posto é no máximo log2(n), então cabe num byte
+
+    def procura(self, i: int):
+        '''
+        Retorna o representante do conjunto que contém i
+        '''
+        pai = self.__pai
+        raiz = i
+        while pai[raiz] != raiz:
+            raiz = pai[raiz]
+        # Compressão de caminho: todos os elementos do caminho passam a apontar direto para a raiz
+        while pai[i] != raiz:
+            pai[i], i = raiz, pai[i]
+        return raiz
+
+    def uniao(self, i: int, j: int):
+        '''
+        Une os conjuntos que contêm i e j, pendurando a árvore de menor posto na de maior posto.
+        :return: True se i e j estavam em conjuntos diferentes, False se já estavam no mesmo conjunto
+        '''
+        raiz_i = self.procura(i)
+        raiz_j = self.procura(j)
+        if raiz_i == raiz_j:
+            return False
+        posto = self.__posto
+        if posto[raiz_i] < posto[raiz_j]:
+            raiz_i, raiz_j = raiz_j, raiz_i
+        self.__pai[raiz_j] = raiz_i
+        if posto[raiz_i] == posto[raiz_j]:
+            posto[raiz_i] += 1
+        return True
+
+
 class Grafo:
 
     QTDE_MAX_SEPARADOR = 1
@@ -42,39 +84,101 @@ class Grafo:
                 self.__maior_vertice = len(v)
 
         self.N = list(V)
-
-        if M == []:
-            for k in range(len(V)):
-                M.append(list())
-                for l in range(len(V)):
-                    if k>l:
-                        M[k].append('-')
-                    else:
-                        M[k].append([])
-
-
-        if len(M) != len(V):
-            raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
-
-        for c in M:
-            if len(c) != len(V):
+        self.__indices = {v: i for i, v in enumerate(self.N)}
+
+        # As células da diagonal principal e acima dela ficam numa única lista, coluna a coluna: a célula (i, j), com i <= j,
+        # fica na posição j(j+1)/2 + i e guarda a lista dos pesos das arestas que ligam os dois vértices
+        self.__celulas = [[] for _ in range(len(V) * (len(V) + 1) // 2)]
+        self.__bits = [0] * len(V) # A vizinhança de cada vértice como conjunto de bits: o bit j vale 1 se o vértice é adjacente a j
+        # Menor peso de cada par de vértices adjacentes (i, j), com i <= j, mantido a cada inclusão e remoção de aresta
+        self.__menores_pesos = {}
+
+        # Como os vértices já foram validados, qualquer par deles forma uma aresta válida; só a matriz precisa ser verificada
+        if M != []:
+            if len(M) != len(V):
                 raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
 
-        for i in range(len(V)):
-            for j in range(len(V)):
-                '''
-                Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
-                Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
-                '''
-                if i>j and not(M[i][j] == '-'):
-                    raise MatrizInvalidaException('A matriz não representa uma matriz não direcionada')
+            for c in M:
+                if len(c) != len(V):
+                    raise MatrizInvalidaException('A matriz passada como parâmetro não tem o tamanho correto')
+
+            for i in range(len(V)):
+                for j in range(len(V)):
+                    '''
+                    Verifica se os índices passados como parâmetro representam um elemento da matriz abaixo da diagonal principal.
+                    Além disso, verifica se o referido elemento é um traço "-". Isso indica que a matriz é não direcionada e foi construída corretamente.
+                    '''
+                    if i>j and not(M[i][j] == '-'):
+                        raise MatrizInvalidaException('A matriz não representa uma matriz não direcionada')
+
+                    if i<=j and M[i][j]:
+                        self.__pesos(i, j).extend(M[i][j])
+                        self.__menores_pesos[(i, j)] = min(M[i][j])
+                        self.__atualiza_bits(i, j)
+
+    @property
+    def M(self):
+        '''
+        A matriz de adjacência do grafo, no mesmo formato da que é passada ao construtor: a lista de pesos das arestas acima
+        da diagonal principal (incluindo a diagonal) e um traço "-" abaixo dela. É uma cópia nova a cada acesso, inclusive as
+        listas de pesos, então alterá-la (por exemplo, g.M[i][j].append(peso)) não altera o grafo: para incluir ou retirar
+        arestas, use adicionaAresta e remove_aresta.
+        '''
+        n = len(self.N)
+        M = [['-'] * n for _ in range(n)]
+        for j in range(n):
+            for i in range(j + 1):
+                M[i][j] = list(self.__celulas[j * (j + 1) // 2 + i])
+        return M
+
+    def __pesos(self, i: int, j: int):
+        '''
+        Retorna a lista de pesos das arestas que ligam os vértices de índices i e j, em qualquer ordem
+        '''
+        if i > j:
+            i, j = j, i
+        return self.__celulas[j * (j + 1) // 2 + i]
+
+    def __menor_peso(self, i: int, j: int):
+        '''
+        Retorna, em O(1), o menor peso entre as arestas que ligam os vértices de índices i e j, ou None se não houver aresta
+        '''
+        return self.__menores_pesos.get((i, j) if i <= j else (j, i))
 
+    def __atualiza_bits(self, i: int, j: int):
+        '''
+        Marca ou desmarca i e j como adjacentes nos conjuntos de bits, conforme ainda existam arestas entre eles
+        '''
+        if self.__pesos(i, j):
+            self.__bits[i] |= 1 << j
+            self.__bits[j] |= 1 << i
+        else:
+            self.__bits[i] &= ~(1 << j)
+            self.__bits[j] &= ~(1 << i)
 
-                aresta = V[i] + Grafo.SEPARADOR_ARESTA + V[j]
-                if not(self.arestaValida(aresta)):
-                    raise ArestaInvalidaException('A aresta ' + aresta + ' é inválida')
+    @staticmethod
+    def __indices_dos_bits(bits: int):
+        '''
+        Percorre, do menor para o maior, os índices dos bits que valem 1 num conjunto de bits
+        '''
+        while bits:
+            menor = bits & -bits
+            yield menor.bit_length() - 1
+            bits ^= menor
 
-        self.M = list(M)
+    def __vizinhos(self, i: int):
+        '''
+        Retorna uma lista de tuplas (j, lista de pesos das arestas entre i e j), ordenada por j, só com os vértices adjacentes a i
+        '''
+        celulas = self.__celulas
+        # Percorre só os bits da linha i, em vez de varrer a coluna inteira
+        lista = []
+        for j in Grafo.__indices_dos_bits(self.__bits[i]):
+            if j <= i:
+                lista.append((j, celulas[i * (i + 1) // 2 + j]))
+            else:
+                lista.append((j, celulas[j * (j + 1) // 2 + i]))
+        return lista
 
     def arestaValida(self, aresta=''):
         '''
@@ -120,39 +224,28 @@ class Grafo:
         :param vertice: O vértice que deve ser verificado.
         :return: Um valor booleano que indica se o vértice existe no grafo.
         '''
-        return Grafo.verticeValido(vertice) and self.N.count(vertice) > 0
+        return Grafo.verticeValido(vertice) and vertice in self.__indices
 
-    def __primeiro_vertice_aresta(self, a: str):
+    def indice_vertice(self, v: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o vértice X
-        :param a: a aresta a ser analisada
-        :return: O primeiro vértice da aresta
-        '''
-        return a[0:a.index(Grafo.SEPARADOR_ARESTA)]
-
-    def __segundo_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o vértice Y
-        :param a: A aresta a ser analisada
-        :return: O segundo vértice da aresta
+        Retorna o identificador inteiro de um vértice, que é a sua posição na lista de vértices e na matriz.
+        :param v: O vértice cujo identificador se deseja
+        :return: O índice do vértice na lista de vértices
+        :raises VerticeInvalidoException se o vértice não existir no grafo.
         '''
-        return a[a.index(Grafo.SEPARADOR_ARESTA)+1:]
+        if v not in self.__indices:
+            raise VerticeInvalidoException('O vértice {} não existe'.format(v))
+        return self.__indices[v]
 
-    def __indice_primeiro_vertice_aresta(self, a: str):
+    def __indices_aresta(self, a: str):
         '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice X na lista de vértices
+        Dada uma aresta no formato X-Y, retorna os índices dos vértices X e Y na lista de vértices,
+        separando o string uma única vez
         :param a: A aresta a ser analisada
-        :return: O índice do primeiro vértice da aresta na lista de vértices
+        :return: Uma tupla com os índices do primeiro e do segundo vértice da aresta
         '''
-        return self.N.index(self.__primeiro_vertice_aresta(a))
-
-    def __indice_segundo_vertice_aresta(self, a: str):
-        '''
-        Dada uma aresta no formato X-Y, retorna o índice do vértice Y na lista de vértices
-        :param a: A aresta a ser analisada
-        :return: O índice do segundo vértice da aresta na lista de vértices
-        '''
-        return self.N.index(self.__segundo_vertice_aresta(a))
+        v1, _, v2 = a.partition(Grafo.SEPARADOR_ARESTA)
+        return self.__indices[v1], self.__indices[v2]
 
     def existeAresta(self, a: str):
         '''
@@ -160,14 +253,18 @@ class Grafo:
         :param aresta: A aresta a ser verificada
         :return: Um valor booleano que indica se a aresta existe no grafo.
         '''
-        existe = False
-        if Grafo.arestaValida(self, a):
-            for i in range(len(self.M)):
-                for j in range(len(self.M)):
-                    if self.M[self.__indice_primeiro_vertice_aresta(a)][self.__indice_segundo_vertice_aresta(a)]:
-                        existe = True
+        if not Grafo.arestaValida(self, a):
+            return False
+        return len(self.__pesos(*self.__indices_aresta(a))) > 0
 
-        return existe
+    def existem_arestas(self, arestas):
+        '''
+        Verifica de uma só vez se cada aresta de uma coleção pertence ao grafo.
+        :param arestas: Um iterável de arestas no formato X-Y
+        :return: Uma lista de valores booleanos, na mesma ordem das arestas recebidas
+        '''
+        existe = self.existeAresta
+        return [existe(a) for a in arestas]
 
     def adicionaVertice(self, v):
         '''
@@ -175,22 +272,17 @@ class Grafo:
         :param v: O vértice a ser incluído no grafo.
         :raises VerticeInvalidoException se o vértice já existe ou se ele não estiver no formato válido.
         '''
-        if v in self.N:
+        if v in self.__indices:
             raise VerticeInvalidoException('O vértice {} já existe'.format(v))
 
         if self.verticeValido(v):
             if len(v) > self.__maior_vertice:
                 self.__maior_vertice = len(v)
 
+            self.__celulas.extend([] for _ in range(len(self.N) + 1)) # Adiciona a coluna do vértice
+            self.__bits.append(0)
             self.N.append(v) # Adiciona vértice na lista de vértices
-            self.M.append([]) # Adiciona a linha
-
-            for k in range(len(self.N)):
-                if k != len(self.N) -1:
-                    self.M[k].append([]) # adiciona os elementos da coluna do vértice
-                    self.M[self.N.index(v)].append('-') # adiciona os elementos da linha do vértice
-                else:
-                    self.M[self.N.index(v)].append([])  # adiciona um zero no último elemento da linha
+            self.__indices[v] = len(self.N) - 1
         else:
             raise VerticeInvalidoException('O vértice ' + v + ' é inválido')
 
@@ -201,15 +293,31 @@ class Grafo:
         :raise: lança uma exceção caso a aresta não estiver em um formato válido
         '''
         if self.arestaValida(a):
-            i_a1 = self.__indice_primeiro_vertice_aresta(a)
-            i_a2 = self.__indice_segundo_vertice_aresta(a)
-            if i_a1 < i_a2:
-                self.M[i_a1][i_a2].append(peso)
-            else:
-                self.M[i_a2][i_a1].append(peso)
+            self.__adiciona_aresta_indices(*self.__indices_aresta(a), peso)
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
+    def adiciona_aresta_ids(self, i: int, j: int, peso):
+        '''
+        Adiciona uma aresta ao grafo a partir dos identificadores inteiros dos seus vértices (ver indice_vertice),
+        sem precisar montar nem interpretar o string X-Y
+        :param i: O índice do primeiro vértice da aresta
+        :param j: O índice do segundo vértice da aresta
+        :param peso: O peso da aresta
+        :raise: lança uma exceção caso algum dos índices não corresponda a um vértice do grafo
+        '''
+        if not (0 <= i < len(self.N) and 0 <= j < len(self.N)):
+            raise ArestaInvalidaException('A aresta ({}, {}) é inválida'.format(i, j))
+        self.__adiciona_aresta_indices(i, j, peso)
+
+    def __adiciona_aresta_indices(self, i_a1: int, i_a2: int, peso):
+        self.__pesos(i_a1, i_a2).append(peso)
+        par = (min(i_a1, i_a2), max(i_a1, i_a2))
+        menor = self.__menores_pesos.get(par)
+        if menor == None or peso < menor:
+            self.__menores_pesos[par] = peso
+        self.__atualiza_bits(i_a1, i_a2)
+
     def remove_aresta(self, a,peso):
         '''
         Remove uma aresta ao grafo no formato X-Y, onde X é o primeiro vértice e Y é o segundo vértice
@@ -218,63 +326,103 @@ class Grafo:
         '''
         if self.arestaValida(a):
             if self.existeAresta(a):
-                i_a1 = self.__indice_primeiro_vertice_aresta(a)
-                i_a2 = self.__indice_segundo_vertice_aresta(a)
-                if i_a1 < i_a2:
-                    self.M[i_a1][i_a2].remove(peso)
-                else:
-                    self.M[i_a2][i_a1].remove(peso)
+                i_a1, i_a2 = self.__indices_aresta(a)
+                pesos = self.__pesos(i_a1, i_a2)
+                pesos.remove(peso)
+                par = (min(i_a1, i_a2), max(i_a1, i_a2))
+                if not pesos:
+                    del self.__menores_pesos[par]
+                elif peso == self.__menores_pesos[par]:
+                    # Só é preciso procurar o novo menor peso entre as paralelas que restaram se o removido era o menor
+                    self.__menores_pesos[par] = min(pesos)
+                self.__atualiza_bits(i_a1, i_a2)
         else:
             raise ArestaInvalidaException('A aresta {} é inválida'.format(a))
 
 
 
+    def vizinhos_em_comum(self, u, v):
+        '''
+        Retorna os vértices adjacentes tanto a u quanto a v, pela interseção dos conjuntos de bits das duas vizinhanças.
+        :param u: O primeiro vértice
+        :param v: O segundo vértice
+        :return: Uma lista com os vértices adjacentes a u e a v, na ordem da lista de vértices
+        '''
+        bits = self.__bits[self.indice_vertice(u)] & self.__bits[self.indice_vertice(v)]
+        return [self.N[j] for j in self.__indices_dos_bits(bits)]
+
+    def vizinhanca(self, vertices):
+        '''
+        Retorna os vértices adjacentes a pelo menos um dos vértices dados, pela união dos conjuntos de bits das vizinhanças.
+        :param vertices: Um iterável de vértices
+        :return: Uma lista com os vértices da vizinhança, na ordem da lista de vértices
+        '''
+        bits = 0
+        for v in vertices:
+            bits |= self.__bits[self.indice_vertice(v)]
+        return [self.N[j] for j in self.__indices_dos_bits(bits)]
+
+    def alcancaveis(self, v):
+        '''
+        Retorna os vértices alcançáveis a partir de v (incluindo o próprio v) por uma busca em largura em que cada nível
+        é expandido de uma só vez, unindo os conjuntos de bits das vizinhanças da fronteira.
+        :param v: O vértice de partida
+        :return: Uma lista com os vértices alcançáveis, na ordem da lista de vértices
+        '''
+        alcancados = fronteira = 1 << self.indice_vertice(v)
+        while fronteira:
+            proxima = 0
+            for i in self.__indices_dos_bits(fronteira):
+                proxima |= self.__bits[i]
+            fronteira = proxima & ~alcancados
+            alcancados |= fronteira
+        return [self.N[j] for j in self.__indices_dos_bits(alcancados)]
+
     def vertices_nao_adjacentes(self):
         lista=[]
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j] == 0 :
-                    lista.append(self.N[i]+self.SEPARADOR_ARESTA+self.N[j])
+        todos = (1 << len(self.N)) - 1
+        for i in range(len(self.N)):
+            # Os bits j >= i que não estão na vizinhança de i
+            livres = ~self.__bits[i] & todos & ~((1 << i) - 1)
+            for j in self.__indices_dos_bits(livres):
+                lista.append(self.N[i]+self.SEPARADOR_ARESTA+self.N[j])
 
         return lista
 
     def ha_laco(self):
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j] != 0 and self.M[i][j] != self.SEPARADOR_ARESTA and self.N[i] == self.N[j]:
-                    return True
+        for i in range(len(self.N)):
+            if self.__pesos(i, i):
+                return True
+        return False
 
 
     def ha_paralelas(self):
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]==2:
+        for i in range(len(self.N)):
+            for j, pesos in self.__vizinhos(i):
+                if len(pesos) > 1:
                     return True
+        return False
 
 
 
     def grau(self,v):
         c=0
-        n=0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]!=self.SEPARADOR_ARESTA:
-                    n=int(self.M[i][j])
-                    if n>=1 and self.N[i]==v or self.N[j]==v:
-                        c+=n
+        for j, pesos in self.__vizinhos(self.indice_vertice(v)):
+            c+=len(pesos)
         return c
 
 
     def arestas_sobre_vertice(self,v):
         lista=[]
-        n=0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if self.M[i][j]!=self.SEPARADOR_ARESTA:
-                    n=int(self.M[i][j])
-                    if ( (n >= 1) and (self.N[i] == v or self.N[j] == v) ):
-                        for c in range(n):
-                            lista.append(self.N[i] + self.SEPARADOR_ARESTA + self.N[j])
+        i_v = self.indice_vertice(v)
+        for j, pesos in self.__vizinhos(i_v):
+            # A aresta é escrita na ordem em que aparece na matriz: o vértice de menor índice primeiro
+            if j < i_v:
+                aresta = self.N[j] + self.SEPARADOR_ARESTA + v
+            else:
+                aresta = v + self.SEPARADOR_ARESTA + self.N[j]
+            for c in range(len(pesos)):
+                lista.append(aresta)
 
         return lista
 
@@ -287,13 +435,10 @@ class Grafo:
         eh completo
         :return: Valor booleano que indica se o grafo eh completo ou nao
         '''
-        matriz = self.M
-
-        for i in range(len(matriz)):
-            for j in range(len(matriz[i])):
-                if i - j < 0:
-                    if matriz[i][j] == 0:
-                        return False
+        todos = (1 << len(self.N)) - 1
+        for i in range(len(self.N)):
+            if self.__bits[i] | (1 << i) != todos:
+                return False
         return True
 
 
@@ -301,147 +446,142 @@ class Grafo:
 
 
 
-    def eh_conexo(self):
-        vertices = self.N
-        conexos = set()
-
-        self.eh_conexo_aux(vertices[0], conexos)
-
-        for i in vertices:
-            if i not in conexos:
-                return False
-        return True
-
-    def eh_conexo_aux(self, vertice='', conexos=set()):
-        matriz = self.M
-        vertices = self.N
-
-        for i in range(len(matriz)):
-            for j in range(len(matriz[i])):
-                if i - j < 0 and len(matriz[i][j]) > 0:
-                    if i == vertices.index(vertice) and vertices[j] not in conexos:
-                        conexos.add(vertices[j])
-                        self.eh_conexo_aux(vertices[j], conexos)
-
-                    if j == vertices.index(vertice) and vertices[i] not in conexos:
-                        conexos.add(vertices[i])
-
-                        self.eh_conexo_aux(vertices[i], conexos)
 
+    def eh_conexo(self):
+        if len(self.N) == 0:
+            return True
+        visitado = bytearray(len(self.N))
+        return len(self.__componente(0, visitado)) == len(self.N)
 
+    def eh_conexo_aux(self, vertice='', conexos=None):
+        '''
+        Acrescenta ao conjunto conexos todos os vértices alcançáveis a partir de vertice (incluindo ele mesmo).
+        :param vertice: O vértice de partida
+        :param conexos: O conjunto que recebe os vértices alcançados. Se não for passado, um novo conjunto é criado
+        :return: O conjunto conexos
+        :raises VerticeInvalidoException se o vértice não existir no grafo.
+        '''
+        inicio = self.indice_vertice(vertice)
+        if conexos == None:
+            conexos = set()
+        visitado = bytearray(len(self.N))
+        for j in self.__componente(inicio, visitado):
+            conexos.add(self.N[j])
+        return conexos
+
+    def componentes_conexos(self):
+        '''
+        Separa os vértices do grafo em componentes conexas, numa única passada O(V+E) sobre as listas de vizinhos.
+        :return: Uma lista de componentes, na ordem do primeiro vértice de cada uma; cada componente é uma lista de vértices na ordem em que foram visitados
+        '''
+        visitado = bytearray(len(self.N))
+        componentes = []
+        for i in range(len(self.N)):
+            if not visitado[i]:
+                componentes.append([self.N[j] for j in self.__componente(i, visitado)])
+        return componentes
+
+    def __componente(self, inicio: int, visitado: bytearray):
+        '''
+        Busca em profundidade com pilha explícita (sem recursão, para não estourar o limite de recursão em grafos grandes)
+        a partir do vértice de índice inicio, marcando em visitado os vértices alcançados.
+        :return: Os índices dos vértices alcançados, na ordem em que foram visitados
+        '''
+        visitado[inicio] = 1
+        pilha = [inicio]
+        alcancados = []
+        while pilha:
+            i = pilha.pop()
+            alcancados.append(i)
+            for j, pesos in self.__vizinhos(i):
+                if not visitado[j]:
+                    visitado[j] = 1
+                    pilha.append(j)
+        return alcancados
 
     def quantidade_de_arestas(self):
         quantidade_de_arestas1 = 0
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if (self.M[i][j] == 1):
+        for i in range(len(self.N)):
+            for j, pesos in self.__vizinhos(i):
+                if i <= j and len(pesos) == 1:
                     quantidade_de_arestas1 += 1
 
         return quantidade_de_arestas1
 
 
+    def __pares(self):
+        '''
+        Percorre os pares de vértices adjacentes (i, j), com i <= j, na ordem das linhas da matriz, produzindo tuplas
+        (i, j, lista de pesos). As listas são as do próprio grafo, sem cópia, e só os pares com arestas são visitados.
+        '''
+        for i in range(len(self.N)):
+            for j, pesos in self.__vizinhos(i):
+                if i <= j:
+                    yield i, j, pesos
+
     def aresta_sobre_vertice_com_peso(self,v):
-        copy = deepcopy(self.M)
+        '''
+        Retorna as arestas que incidem sobre v, uma por par de vértices adjacentes, no formato X-Y da matriz (X antes de Y na lista de vértices)
+        '''
+        if not self.existeVertice(v):
+            return []
+        i_v = self.__indices[v]
         lista = []
-        for i in range(len(copy)):
-            for j in range(len(copy[i])):
-                if copy[i][j] != self.SEPARADOR_ARESTA:
-
-                    if len(copy[i][j])>=1 and (self.N[i]==v or self.N[j]==v):
-                        aresta = self.N[i] + self.SEPARADOR_ARESTA + self.N[j]
-                        if aresta not in lista:
-                            lista.append(aresta)
+        for j, pesos in self.__vizinhos(i_v):
+            if j < i_v:
+                lista.append(self.N[j] + self.SEPARADOR_ARESTA + v)
+            else:
+                lista.append(v + self.SEPARADOR_ARESTA + self.N[j])
         return lista
 
     def menor_peso_da_aresta(self):
-        dic = {}
-        copia = deepcopy(self.M)
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if (len(self.M[i][j]) != 0) and (self.M[i][j]!= self.SEPARADOR_ARESTA):
-                    aresta = '{}{}{}'.format(self.N[i],self.SEPARADOR_ARESTA,self.N[j])
-                    dic[aresta]=min(self.M[i][j])
-
-        return dic
-
-
-
-    def procura(self,v,lista=[]):
-        v1=v
-        print(v)
-        print(lista)
-        if len(lista)>0:
-            for i in lista:
-                print(i)
-                if v1 not in i:
-                    return True
-                else:
-                    return False
-        return True
-
-
+        '''
+        Retorna um dicionário que associa cada aresta X-Y ao menor peso entre as suas arestas paralelas
+        '''
+        N = self.N
+        menores = self.__menores_pesos
+        return {N[i] + self.SEPARADOR_ARESTA + N[j]: menores[(i, j)] for i, j, pesos in self.__pares()}
 
+    def peso_da_aresta(self, a):
+        '''
+        Retorna o menor peso entre as arestas paralelas X-Y, sem percorrer a lista de pesos.
+        :param a: A aresta no formato X-Y
+        :return: O menor peso, ou None se a aresta não existir
+        '''
+        if not self.arestaValida(a):
+            return None
+        return self.__menor_peso(*self.__indices_aresta(a))
 
 
     '''
     - Roteiro 8 - Minimum Spanning Tree, Inicio -
     '''
 
-    sets = {}
-
-    def criar_floresta(self,v):
-        self.sets[v]=[v]
-
-    def procura(self,v):
-        for i,x in self.sets.items():
-            if v in x:
-                return i
-        return None
-
-
-    def uniao(self,v1,v2):
-        vertice1 = self.procura(v1)
-        vertice2 = self.procura(v2)
-        self.sets[vertice1]=self.sets[vertice1]+self.sets[vertice2]
-        del self.sets[vertice2]
-
-
     def Kruskall_modificado(self):
         """
         Algoritmo original de Kruskal para encontrar a Árvore de Extensão Mínima (Minimum Spanning Tree) do Grafo.
-        :return: Um Grafo/Árvore representando a Minimum Spanning Tree.
+        Cada par de vértices adjacentes entra uma única vez, com o menor peso entre as suas arestas paralelas, lido do índice
+        de menores pesos sem percorrer a matriz. Os pares são ordenados por peso uma única vez e os componentes são controlados por uma floresta de conjuntos disjuntos própria
+        de cada chamada, o que dá O(E log E).
+        :return: Um Grafo/Árvore representando a Minimum Spanning Tree, ou None se o grafo não for conexo.
         """
+        # Os laços nunca entram na árvore
+        pares = sorted((peso, i, j) for (i, j), peso in self.__menores_pesos.items() if i < j)
+
         #Cria o Grafo/Árvore
-        arvore_minima = Grafo ()
-
-        for i in self.N:
-            self.criar_floresta(i)
-
-        arvore = []
-        dicionarioArestasComPesos = self.menor_peso_da_aresta()
-        arestas_menor_peso = self.menor_peso_da_aresta()
-        arestas_menor_peso = arestas_menor_peso.values()
-        vertices_não_presentes_na_arvore = self.N
-        if self.eh_conexo():
-            for a in arestas_menor_peso:
-                for i in dicionarioArestasComPesos:
-                    if dicionarioArestasComPesos[i]== a:
-                        if self.procura(i[0]) != self.procura(i[2]):
-                            v1=i[0]
-                            v2=i[2]
-                            arvore.append(i)
-                            arvore.append(v1)
-                            arvore.append(v2)
-                            existe_vertice1 = arvore_minima.existeVertice(v1)
-                            existe_vertice2 = arvore_minima.existeVertice(v2)
-                            if not existe_vertice1:
-                                arvore_minima.adicionaVertice(v1)
-                            if not existe_vertice2:
-                                arvore_minima.adicionaVertice(v2)
-                            if not (existe_vertice1 and existe_vertice2) or (existe_vertice1 and existe_vertice2):
-                                arvore_minima.adicionaAresta(i,a)
-                            self.uniao(v1,v2)
-            return arvore_minima
+        arvore_minima = Grafo(self.N)
+        floresta = ConjuntosDisjuntos(len(self.N))
+        quantidade = 0
+        for peso, i, j in pares:
+            if floresta.uniao(i, j):
+                arvore_minima.adiciona_aresta_ids(i, j, peso)
+                quantidade += 1
+                if quantidade == len(self.N) - 1:
+                    break
+
+        if quantidade < len(self.N) - 1:
+            return None
+        return arvore_minima
 
 
     def procurar_na_arvore(self,vertice,lista=[]):
@@ -453,29 +593,17 @@ class Grafo:
 
 
     def dicionario_peso_aresta(self):
-        dic = {}
-        copia = deepcopy(self.M)
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if (len(self.M[i][j]) != 0) and (self.M[i][j] != self.SEPARADOR_ARESTA):
-                    aresta = '{}{}{}'.format(self.N[i], self.SEPARADOR_ARESTA, self.N[j])
-                    dic[aresta] = self.M[i][j]
-
-        return dic
+        '''
+        Retorna um dicionário que associa cada aresta X-Y a uma cópia da lista de pesos das suas arestas paralelas
+        '''
+        N = self.N
+        return {N[i] + self.SEPARADOR_ARESTA + N[j]: list(pesos) for i, j, pesos in self.__pares()}
 
     def vertices_adjacentes(self, v):
         lista_vertices_adjacentes = []
-        posição = self.N.index(v)
-        for i in range(len(self.M)):
-            if i < posição:
-                if self.M[i][posição]:
-                    lista_vertices_adjacentes.append(self.N[i])
-            elif i == posição:
-                for j in range(posição, len(self.M[i])):
-                    if self.M[i][j]:
-                        lista_vertices_adjacentes.append(self.N[j])
-            else:
-                break
+        posição = self.__indices[v]
+        for j, pesos in self.__vizinhos(posição):
+            lista_vertices_adjacentes.append(self.N[j])
         return lista_vertices_adjacentes
 
     def criar_aresta(self,v1,v2):
@@ -484,77 +612,37 @@ class Grafo:
 
 
     def PrimModificado(self):
-        from math import inf
-        vertices = deepcopy(self.N)
-        arestas = []
-        for i in range(len(self.M)):
-            for j in range(len(self.M[i])):
-                if (len(self.M[i][j]) != 0) and (self.M[i][j] != self.SEPARADOR_ARESTA):
-                    aresta1 = '{}{}{}'.format(self.N[i], self.SEPARADOR_ARESTA, self.N[j])
-                    arestas.append(aresta1)
-        dic_peso = self.dicionario_peso_aresta()
-        Jet = {}
-        P = {}
-        guarda_peso = inf
-        guarda_aresta =''
-        arvore = Grafo()
-        for vertice in vertices:
-            Jet[vertice] = inf
-            P[vertice] = None
-
-        for aresta in arestas:
-            listap= dic_peso[aresta]
-            peso = listap[0]
-            if peso< guarda_peso:
-                guarda_peso = peso
-                guarda_aresta = aresta
-                v1,v2 = aresta.split(self.SEPARADOR_ARESTA)
-        Jet[v1] = 0
-        lista_prioridade = deepcopy(self.N)
-        while(len(lista_prioridade)!=0):
-            menor_peso = inf
-            vertice_menor_peso = ''
-            for v in lista_prioridade:
-                if isinstance(Jet[v],list)==True:#problema é aqui
-                    jet = Jet[v][0]
-                    if jet<menor_peso:
-                        pesolista = Jet[v]
-                        menor_peso = pesolista[0]
-                        vertice_menor_peso= v
-                else:
-                    if Jet[v] < menor_peso:
-                        menor_peso = Jet[v]
-                        vertice_menor_peso = v
-            x = vertice_menor_peso
-
-            lista_prioridade.pop(lista_prioridade.index(vertice_menor_peso))
-            lista_vertices_adjacente = self.vertices_adjacentes(x)
-            for vertice_adjacente in lista_vertices_adjacente:
-                aresta_y = x+"-"+vertice_adjacente
-                if aresta_y not in arestas:
-                    aresta_y = vertice_adjacente+'-'+x
-                pesoy = dic_peso[aresta_y][0]
-                jety = Jet[vertice_adjacente]
-                if isinstance(jety,list)==True:
-                    if vertice_adjacente in lista_prioridade and pesoy<jety[0]:
-                        P[vertice_adjacente] = x
-                        Jet[vertice_adjacente]= dic_peso[aresta_y]
-                else:
-                    if vertice_adjacente in lista_prioridade and pesoy<jety:
-                        P[vertice_adjacente] = x
-                        Jet[vertice_adjacente]= dic_peso[aresta_y]
-        for v in vertices:
-            arvore.adicionaVertice(v)
-        lista_final = []
-        for a,i in P.items():
-            if i:
-                lista_final.append(self.criar_aresta(i,a))
-        dic_menor_peso = self.menor_peso_da_aresta()
-        for i in lista_final:
-            if i in dic_menor_peso:
-                arvore.adicionaAresta(i,dic_menor_peso[i])
-
-        return arvore
+        """
+        Algoritmo de Prim para encontrar a Árvore de Extensão Mínima (Minimum Spanning Tree) do Grafo, a partir do primeiro vértice.
+        As arestas candidatas ficam num heap com remoção preguiçosa, e cada par de vértices adjacentes entra com o menor peso
+        entre as suas arestas paralelas, o que dá O(E log V).
+        :return: Uma tupla com o Grafo/Árvore representando a Minimum Spanning Tree e o seu peso total, ou None se o grafo não for conexo.
+        """
+        arvore = Grafo(self.N)
+        peso_total = 0
+        if len(self.N) == 0:
+            return arvore, peso_total
+
+        na_arvore = bytearray(len(self.N))
+        quantidade = 0
+        heap = [(0, 0, 0)] # (peso, vértice, vértice da árvore de onde a aresta parte)
+        while heap:
+            peso, x, origem = heappop(heap)
+            if na_arvore[x]: # Entrada antiga, x já entrou na árvore por uma aresta mais leve
+                continue
+            na_arvore[x] = 1
+            if x != origem:
+                arvore.adiciona_aresta_ids(origem, x, peso)
+                peso_total += peso
+            quantidade += 1
+            for y in Grafo.__indices_dos_bits(self.__bits[x]):
+                if not na_arvore[y]:
+                    heappush(heap, (self.__menor_peso(x, y), y, x))
+
+        if quantidade < len(self.N):
+            return None
+        return arvore, peso_total
+
     def __str__(self):
         '''
         Fornece uma representação do tipo String do grafo.
@@ -574,13 +662,14 @@ class Grafo:
 
         grafo_str += '\n'
 
-        for l in range(len(self.M)):
+        celulas = self.__celulas # Lido direto, sem as cópias que M faz
+        for l in range(len(self.N)):
             grafo_str += self.N[l] + ' '
-            for c in range(len(self.M)):
-                if self.M[l][c] =='-':
+            for c in range(len(self.N)):
+                if c < l:
                     grafo_str += '-' + ' '
                 else:
-                    grafo_str += str(len(self.M[l][c])) + ' ' #recebe o tamanho de self.M[l][c] pois se tiverem dois pesos, então haverá duas arestas, se não tiver nenhum, n tem aresta e o len==0
+                    grafo_str += str(len(celulas[c * (c + 1) // 2 + l])) + ' ' #recebe o tamanho de matriz[l][c] pois se tiverem dois pesos, então haverá duas arestas, se não tiver nenhum, n tem aresta e o len==0
             grafo_str += '\n'
 
         return grafo_str